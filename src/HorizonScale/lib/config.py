@@ -19,6 +19,7 @@ Success (Exit Criteria):
 
 from pathlib import Path  
 import enum  
+import os
 
 # =============================================================================
 # 1. DIRECTORY & PATH ARCHITECTURE
@@ -136,8 +137,40 @@ CAPACITY_FIELDS = {
     'network': 'throughput_mbps'
 }
 
+# Legacy CSV layouts in file column order (For 03_data_pipeline.py): explicit
+# types let the refinery skip DuckDB's CSV sniffer on every monthly file
+LEGACY_CSV_COLUMNS = {
+    res: {'date': 'DATE', 'host_id': 'VARCHAR', f'{res}_p95': 'DOUBLE', CAPACITY_FIELDS[res]: 'BIGINT'}
+    for res in RESOURCE_FILE_PREFIXES
+}
+
 # =============================================================================
 # 5. FORECASTING PARAMETERS
 # =============================================================================
 FORECAST_START_DATE = "2025-12-01" 
-FORECAST_HORIZON = 180  # 6-month projection
\ No newline at end of file
+FORECAST_HORIZON = 180  # 6-month projection
+
+# =============================================================================
+# 6. DUCKDB ENGINE SETTINGS
+# =============================================================================
+# Applied to the heavy ingest/fleet connections (03, 06): one thread per physical
+# core, a spill ceiling below workstation RAM, and a dedicated spill directory
+DUCKDB_THREADS = max(1, (os.cpu_count() or 2) // 2)
+
+# Spill ceiling: HORIZONSCALE_DUCKDB_MEMORY_LIMIT wins (e.g. "48GB"); otherwise 75%
+# of physical RAM. None (no sysconf, e.g. Windows) keeps DuckDB's own default.
+try:
+    _PHYS_MEM_GB = os.sysconf('SC_PAGE_SIZE') * os.sysconf('SC_PHYS_PAGES') / 1024**3
+except (AttributeError, ValueError, OSError):
+    _PHYS_MEM_GB = None
+DUCKDB_MEMORY_LIMIT = os.environ.get("HORIZONSCALE_DUCKDB_MEMORY_LIMIT") or (
+    f"{max(1, int(_PHYS_MEM_GB * 0.75))}GB" if _PHYS_MEM_GB else None
+)
+DUCKDB_TEMP_DIR = PROJECT_ROOT / "data" / "synthetic" / "duckdb_tmp"
+
+# =============================================================================
+# 7. DIRECTORY BOOTSTRAP
+# =============================================================================
+# Output directories are created once at import so hot paths never mkdir/stat
+for _output_dir in (PLOTS_DIR, LOG_DIR, MASTER_DATA_DIR):
+    _output_dir.mkdir(parents=True, exist_ok=True)
\ No newline at end of file
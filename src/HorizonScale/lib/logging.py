@@ -52,8 +52,7 @@ def init_root_logging(script_name: str) -> logging.Logger:
     2. Synchronized output to both the terminal (INFO level) and file (DEBUG level).
     3. Structural metadata (file:function) is injected into every message.
     """
-    # Ensure the log directory exists before attempting to write
-    LOG_DIR.mkdir(parents=True, exist_ok=True)
+    # LOG_DIR is created once by config at import
     log_file = LOG_DIR / f"{script_name}.log"
     
     # Access the Root Logger to control all downstream logging behavior
@@ -65,8 +64,13 @@ def init_root_logging(script_name: str) -> logging.Logger:
     logging.getLogger("faker").setLevel(logging.INFO)
     # -----------------------------
     
-    # IDEMPOTENCY: Clear existing handlers to prevent duplicate log entries 
-    # if the initialization is called multiple times.
+    # IDEMPOTENCY: A repeat call for the same script keeps the open log intact
+    # instead of truncating it (mode='w') and rebuilding the handlers.
+    if any(isinstance(h, logging.FileHandler) and Path(h.baseFilename) == log_file.resolve()
+           for h in root.handlers):
+        return root
+    
+    # Clear handlers left by a different script to prevent duplicate log entries
     if root.hasHandlers():
         root.handlers.clear()
 
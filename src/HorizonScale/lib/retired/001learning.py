@@ -1,104 +1,297 @@
-# src/horizonscale/lib/scenario_generators.py  
-# Author: Sean L Girgis  
+"""
+001learning.py
+Author: Sean L. Girgis
 
-import random
+Purpose:
+    Retired laboratory copy of the STEADY_GROWTH generator, kept for JIT and
+    fleet-mode experiments. It is not the production scenario_generators.py.
+
+Genesis (Entrance Criteria):
+    - All enums, bounds and paths come from the single horizonscale.lib.config
+      module, so Scenario members compare equal to the production dispatcher's.
+"""
+
+import logging
+import math
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import NamedTuple
+import functools
 import numpy as np  
-import matplotlib.pyplot as plt
-import pandas as pd
 from horizonscale.lib.config import (
-    Scenario, PLOTS_DIR, GENERATOR_CONFIG, TIME_START, SCENARIO_VARIANTS
+    Scenario, PLOTS_DIR, GENERATOR_CONFIG, TIME_START, SCENARIO_VARIANTS, SEED_MODULO
 )
 from horizonscale.lib.logging import init_root_logging
 from pathlib import Path
 
+# Numba is optional: environments without llvmlite fall back to NumPy kernels
+try:
+    # The lab fans scenarios out over a process pool, and the TBB layer hangs at
+    # interpreter exit once a pool has been used; workqueue is fork/spawn clean
+    os.environ.setdefault("NUMBA_THREADING_LAYER", "workqueue")
+    from numba import njit, prange
+    HAS_NUMBA = True
+except ImportError:
+    HAS_NUMBA = False
+
 # Initialize specialized logging
 logger = init_root_logging(Path(__file__).stem)
 
-def generate_steady_growth(days: int, variant: str = 'NORMAL', base_seed: int = 0) -> np.ndarray:  
+# Angular frequency of the 7-day weekly cycle
+TWO_PI_OVER_7 = 2.0 * math.pi / 7.0
+
+# Weekly seasonality LUT: sin(2*pi*i/7) only takes 7 distinct values, so the
+# kernels index this table instead of evaluating sin() once per day
+_SEASON7 = np.sin(TWO_PI_OVER_7 * np.arange(7)).astype(np.float32)
+
+class SGParams(NamedTuple):
+    """Flat float bounds for one STEADY_GROWTH variant (frozen from GENERATOR_CONFIG)."""
+    base_lo: float
+    base_hi: float
+    g_lo: float
+    g_hi: float
+    std_lo: float
+    std_hi: float
+    noise_lo: float
+    noise_hi: float
+    amp_lo: float
+    amp_hi: float
+
+# Built once at import: attribute access replaces per-call nested dict lookups
+SG_PARAMS = {
+    v_key: SGParams(*cfg["base_range"], *cfg["growth_total_range"], *cfg["std_growth"],
+                    *cfg["noise_std"], *cfg["season_amp"])
+    for v_key, cfg in GENERATOR_CONFIG[Scenario.STEADY_GROWTH].items()
+}
+
+# Vectorized bounds per variant, ordered (base, growth_total, std_growth,
+# noise_std, season_amp): one rng.uniform(lows, highs) call draws the full DNA
+SG_BOUNDS = {
+    v_key: (np.array(p[0::2]), np.array(p[1::2]))
+    for v_key, p in SG_PARAMS.items()
+}
+
+if HAS_NUMBA:
+    @njit(inline='always')
+    def _clip_pct(v):
+        """Branchy [0, 100] clamp, inlined into the streaming kernels."""
+        return 0.0 if v < 0.0 else (100.0 if v > 100.0 else v)
+
+    # Explicit signatures compile eagerly (skipping type inference) and, with
+    # cache=True, the machine code is persisted so later runs skip JIT warmup
+    @njit("void(float32[:], float64, float64, float64, float64, float64, int64)",
+          cache=True, fastmath=True)
+    def _sg_fill(out, base, mean_dg, std_dg, noise_std, season_amp, seed):
+        """
+        JIT KERNEL: Fuses drift, seasonality, noise and clipping into one pass
+        over a single output row. The trend is a running scalar, so no
+        intermediate arrays are allocated.
+        """
+        np.random.seed(seed)
+        # Trend accumulator starts at the base level (cumsum lives in a register)
+        acc = base
+        for i in range(out.shape[0]):
+            acc += mean_dg + std_dg * np.random.randn()
+            s = season_amp * _SEASON7[i % 7]
+            v = acc + s + noise_std * np.random.randn()
+            out[i] = _clip_pct(v)
+
+    @njit("void(float64[:, ::1], int64[::1], float32[:, ::1])",
+          parallel=True, fastmath=True, cache=True)
+    def _sg_batch(params, seeds, out):
+        """
+        PARALLEL KERNEL: Fills one row per host across all cores. Numba keeps an
+        independent RNG state per thread, so reseeding inside prange stays
+        deterministic per host.
+        """
+        for h in prange(out.shape[0]):
+            _sg_fill(out[h], params[h, 0], params[h, 1], params[h, 2],
+                     params[h, 3], params[h, 4], seeds[h])
+else:
+    def _sg_fill(out, base, mean_dg, std_dg, noise_std, season_amp, seed):
+        """
+        NUMPY FALLBACK: Same maths as the JIT kernel, executed as vectorized
+        passes with the noise streams drawn from a seeded PCG64 Generator.
+        """
+        rng = np.random.default_rng(seed)
+        days = out.shape[0]
+        util = rng.normal(mean_dg, std_dg, days)
+        np.cumsum(util, out=util)
+        util += base
+        # One scratch buffer carries the weekly term, then the noise draw
+        scratch = np.empty(days)
+        np.multiply(np.resize(_SEASON7, days), season_amp, out=scratch)
+        util += scratch
+        rng.standard_normal(out=scratch)
+        scratch *= noise_std
+        util += scratch
+        np.clip(util, 0.0, 100.0, out=out)
+
+    def _sg_batch(params, seeds, out):
+        """NUMPY FALLBACK: Fills the fleet matrix one host row at a time."""
+        for h in range(out.shape[0]):
+            _sg_fill(out[h], *params[h], seeds[h])
+
+def generate_steady_growth(days: int, variant: str = 'NORMAL', base_seed: int = 0,
+                           out: np.ndarray = None) -> np.ndarray:  
     """
     MATHEMATICAL DNA: STEADY GROWTH
     Implements a random walk with drift, seasonality, and Gaussian noise.
+    When a float32 'out' buffer is supplied the series is written in place.
     """
-    np.random.seed(base_seed)
+    # Local PCG64 Generator: faster than the legacy global MT19937 state and
+    # safe to use from parallel host workers
+    rng = np.random.default_rng(base_seed)
     
     # 1. Parameter Extraction
-    # Ensure variant is lowercase to match the standardized config keys
-    v_key = variant.upper() 
-    cfg = GENERATOR_CONFIG[Scenario.STEADY_GROWTH][v_key]
+    # Ensure variant is UPPERCASE to match the standardized config keys
+    lows, highs = SG_BOUNDS[variant.upper()]
     
-    # Extract bounds from the config dictionary
-    base = np.random.uniform(*cfg["base_range"])
-    mean_daily_growth = np.random.uniform(*cfg["growth_total_range"]) / days
-    std_daily_growth = np.random.uniform(*cfg["std_growth"])
-    noise_std = np.random.uniform(*cfg["noise_std"])
-    season_amp = np.random.uniform(*cfg["season_amp"])        
+    # Draw the full host DNA in a single vectorized call
+    base, growth_total, std_daily_growth, noise_std, season_amp = rng.uniform(lows, highs)
+    mean_daily_growth = growth_total / days
 
     # 2. Mathematical Component Construction
-    # Trend: Cumulative sum of daily random growth steps (Drift)
-    daily_steps = np.random.normal(mean_daily_growth, std_daily_growth, days)  
-    trend = base + np.cumsum(daily_steps)
+    # Trend (drift), 7-day seasonality and jitter are assembled and clipped to
+    # physically realistic bounds (0-100%) inside the compiled kernel.
+    if out is None:
+        out = np.empty(days, np.float32)
+    _sg_fill(out, base, mean_daily_growth, std_daily_growth,
+             noise_std, season_amp, base_seed)
+    return out
+
+def generate_steady_growth_batch(n_hosts: int, days: int, variant: str = 'NORMAL', base_seed: int = 0,
+                                 out: np.ndarray = None) -> np.ndarray:
+    """
+    MATHEMATICAL DNA: STEADY GROWTH (FLEET MODE)
+    Fleet twin of generate_steady_growth that synthesizes an (n_hosts, days)
+    matrix in one call, filling host rows in parallel across all cores.
+    A preallocated float32 'out' matrix may be passed to avoid reallocation.
+    """
+    rng = np.random.default_rng(base_seed)
+    lows, highs = SG_BOUNDS[variant.upper()]
 
-    # Seasonality: 7-day weekly cycle
-    t = np.arange(days)
-    seasonality = season_amp * np.sin(2 * np.pi * t / 7)
+    # 1. Per-host Parameter Extraction: one row of DNA per host, one draw
+    params = rng.uniform(lows, highs, size=(n_hosts, lows.size))
+    params[:, 1] /= days
+    seeds = rng.integers(0, SEED_MODULO, size=n_hosts)
 
-    # Noise: Unpredictable jitter
-    noise = np.random.normal(0, noise_std, days)
+    # 2. Matrix Construction: each host row is assembled by the parallel kernel
+    if out is None:
+        out = np.empty((n_hosts, days), np.float32)
+    _sg_batch(params, seeds, out)
+    return out
 
-    # 3. Final Assembly
-    # Clip values to physically realistic bounds (0-100%)
-    series = trend + seasonality + noise
-    return np.clip(series, 0, 100).astype(np.float32)
+def _uniform_f32(days: int, low: float, high: float, base_seed: int) -> np.ndarray:
+    """Placeholder draw in native float32: scaled in place, no float64 cast copy."""
+    out = np.random.default_rng(base_seed).random(days, dtype=np.float32)
+    out *= high - low
+    out += low
+    return out
+
+# Shared Diagnostic Canvas: one Figure is reused across scenarios
+MAX_PLOT_POINTS = 2000
+
+@functools.lru_cache(maxsize=1)
+def _diagnostic_canvas():
+    """Agg-backed Figure/Axes built on first plot; raw/plot=False runs never import matplotlib."""
+    from matplotlib.figure import Figure
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    fig = Figure(figsize=(12, 5))
+    FigureCanvasAgg(fig)
+    return fig, fig.subplots()
 
 # Centralized Dispatcher
 # Maps Scenario Enum members to their respective math functions
 GENERATORS = {  
     Scenario.STEADY_GROWTH: generate_steady_growth,
     # Placeholders for other scenarios until implemented
-    Scenario.SEASONAL: lambda days, **kwargs: np.random.uniform(20, 40, days),
-    Scenario.BURST: lambda days, **kwargs: np.random.uniform(10, 30, days),
-    Scenario.LOW_IDLE: lambda days, **kwargs: np.random.uniform(1, 5, days),
-    Scenario.CAPACITY_BREACH: lambda days, **kwargs: np.linspace(60, 100, days)
+    Scenario.SEASONAL: lambda days, base_seed=0, **kwargs: _uniform_f32(days, 20, 40, base_seed),
+    Scenario.BURST: lambda days, base_seed=0, **kwargs: _uniform_f32(days, 10, 30, base_seed),
+    Scenario.LOW_IDLE: lambda days, base_seed=0, **kwargs: _uniform_f32(days, 1, 5, base_seed),
+    Scenario.CAPACITY_BREACH: lambda days, **kwargs: np.linspace(60, 100, days, dtype=np.float32)
 }
 
-def run_diagnostic_lab(scenario_enum: Scenario, test_days: int = 1095):
+# Fleet Dispatcher: scenarios that can synthesize many hosts in one call
+BATCH_GENERATORS = {
+    Scenario.STEADY_GROWTH: generate_steady_growth_batch
+}
+
+def run_diagnostic_lab(scenario_enum: Scenario, test_days: int = 1095, n_hosts: int = 1,
+                       raw: bool = False, plot: bool = True) -> np.ndarray:
     """
     Experimental Lab: Generates, visualizes, and saves diagnostic plots.
+    Scenarios with a batch generator synthesize all n_hosts in a single call.
+    With raw=True the fleet is dumped to .npz and matplotlib is skipped (headless CI).
+    With plot=False only the fleet matrix is generated and returned.
     """
-    # 1. Setup Temporal Context & Independent Seeds
-    date_range = pd.date_range(start=TIME_START, periods=test_days, freq='D')
-    seed_alpha = random.randint(10000, 99999)
+    # 1. Setup Independent Seeds
+    # SeedSequence.spawn yields statistically independent per-host streams
+    # without rejection sampling or adjacent (seed + h) integer seeds
+    root_ss = np.random.SeedSequence()
+    host_seeds = [int(child.generate_state(1)[0]) for child in root_ss.spawn(n_hosts)]
+    seed_alpha = host_seeds[0]
     
     # 2. Extract Variants for this Scenario
     variants = SCENARIO_VARIANTS[scenario_enum]
     v_common = variants['common']
     
     # 3. Generate Data via Dispatcher
-    gen_func = GENERATORS[scenario_enum] 
-    logger.info(f"Generating diagnostic: {scenario_enum.name} ({v_common})")
+    logger.info(f"Generating diagnostic: {scenario_enum.name} ({v_common}) x {n_hosts} hosts")
+    
+    # The fleet matrix is allocated once; generators write rows in place
+    fleet = np.empty((n_hosts, test_days), dtype=np.float32)
+    if scenario_enum in BATCH_GENERATORS:
+        BATCH_GENERATORS[scenario_enum](n_hosts, test_days, variant=v_common, base_seed=seed_alpha, out=fleet)
+    else:
+        gen_func = GENERATORS[scenario_enum]
+        for h in range(n_hosts):
+            fleet[h] = gen_func(test_days, variant=v_common, base_seed=host_seeds[h])
     
-    series = gen_func(test_days, variant=v_common, base_seed=seed_alpha)
+    # Reductions over the fleet only run when DEBUG output is actually enabled
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug("Fleet summary: mean=%.3f std=%.3f max=%.3f",
+                     fleet.mean(), fleet.std(), fleet.max())
     
-    # 4. Visualization
-    plt.figure(figsize=(12, 5))
-    plt.plot(date_range, series, label=f"Variant: {v_common}")
-    plt.title(f"Laboratory Diagnostic: {scenario_enum.name} | Seed: {seed_alpha}")
-    plt.ylabel("Utilization %")
-    plt.grid(True, alpha=0.3)
-    plt.legend()
+    # Headless mode: persist the raw series and render on demand later
+    if raw:
+        raw_path = PLOTS_DIR / f"diagnostic_{scenario_enum.value}.npz"
+        np.savez_compressed(raw_path, series=fleet, seed=seed_alpha)
+        logger.info("SUCCESS: Diagnostic series saved to %s", raw_path)
+        return fleet
+    
+    # Generation-only path: no pandas import, no DatetimeIndex allocation
+    if not plot:
+        return fleet
+    
+    # 4. Visualization (downsampled: the canvas has fewer pixels than days)
+    import pandas as pd
+    date_range = pd.date_range(start=TIME_START, periods=test_days, freq='D')
+    step = max(1, test_days // MAX_PLOT_POINTS)
+    x = date_range[::step]
+    fig, ax = _diagnostic_canvas()
+    ax.cla()
+    ax.plot(x, fleet[0, ::step], label=f"Variant: {v_common}")
+    for series in fleet[1:]:
+        ax.plot(x, series[::step], alpha=0.3, linewidth=0.8)
+    ax.set_title(f"Laboratory Diagnostic: {scenario_enum.name} | Seed: {seed_alpha}")
+    ax.set_ylabel("Utilization %")
+    ax.grid(True, alpha=0.3)
+    ax.legend()
     
-    # Ensure directory exists and save
-    PLOTS_DIR.mkdir(parents=True, exist_ok=True)
+    # PLOTS_DIR is created once by config at import
     plot_path = PLOTS_DIR / f"diagnostic_{scenario_enum.value}.png"
-    plt.savefig(plot_path)
-    plt.close()
+    # Low dpi + fast zlib level: PNG encoding dominates large sweeps
+    fig.savefig(plot_path, dpi=72, pil_kwargs={"compress_level": 1})
     
-    print(f"SUCCESS: Diagnostic plot saved to {plot_path}")
+    logger.info("SUCCESS: Diagnostic plot saved to %s", plot_path)
+    return fleet
 
 if __name__ == "__main__":
-    # Test implemented scenarios
-    test_scenarios = [Scenario.STEADY_GROWTH]
+    # Run every dispatcher entry (placeholders included); scenarios are
+    # independent, so each one renders in its own process
+    test_scenarios = list(GENERATORS)
     
-    print(f"Starting Laboratory Diagnostics for {len(test_scenarios)} scenarios...")
-    for scenario in test_scenarios:
-        run_diagnostic_lab(scenario)
\ No newline at end of file
+    logger.info("Starting Laboratory Diagnostics for %d scenarios...", len(test_scenarios))
+    with ProcessPoolExecutor(max_workers=min(len(test_scenarios), os.cpu_count() or 1)) as executor:
+        list(executor.map(run_diagnostic_lab, test_scenarios))
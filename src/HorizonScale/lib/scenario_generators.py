@@ -10,6 +10,7 @@ Purpose:
 Genesis (Entrance Criteria):
     - Must be called with a valid 'variant' string matching config.py (UPPERCASE).
     - Requires NumPy for vector-based time-series synthesis.
+    - Requires Numba for the fused per-day kernels (compiled on first call, cached on disk).
 
 Success (Exit Criteria):
     - Returns a NumPy ndarray representing daily p95 utilization.
@@ -17,104 +18,281 @@ Success (Exit Criteria):
     - Results are deterministic when provided with a consistent base_seed.
 """
 
-import random
+import functools
+import logging
+import math
 import numpy as np  
-from pathlib import Path
+from numba import get_num_threads, njit, prange, types
 from horizonscale.lib.config import (
     Scenario, PLOTS_DIR, GENERATOR_CONFIG, TIME_START, SCENARIO_VARIANTS
 )
-from horizonscale.lib.logging import init_root_logging
 
-# Initialize specialized logging
-logger = init_root_logging(Path(__file__).stem)
+# Library module: entry-point scripts own the root logger configuration
+logger = logging.getLogger(__name__)
+
+# =============================================================================
+# 0. FUSED KERNELS
+# =============================================================================
+# Each kernel walks the horizon once: running trend, seasonality, noise and clip
+# are computed per day and written straight into a float32 output. Random draws
+# stay in NumPy (Numba's RNG stream differs) and are passed in as float32 standard
+# normals, so every array the kernels touch is 4 bytes/element.
+# Angular frequencies and per-host amplitudes are folded once, outside every loop
+YEAR_FREQ = 2.0 * math.pi / 365.0
+WEEK_FREQ = 2.0 * math.pi / 7.0
+
+# Working-set budget per host tile in the fleet generator (typical per-core L2)
+L2_TILE_BYTES = 256 * 1024
+
+# Eager kernel signatures: each kernel is compiled (or loaded from the on-disk cache)
+# at import for exactly these types, so the first host never pays for type inference
+_F8 = types.float64
+_F4 = types.Array(types.float32, 1, 'C')
+_F4_RO = types.Array(types.float32, 1, 'C', readonly=True)
+_F4_A = types.Array(types.float32, 1, 'A')
+_F4_2D = types.Array(types.float32, 2, 'C')
+_F4_2A = types.Array(types.float32, 2, 'A')
+_I8 = types.Array(types.int64, 1, 'C')
+
+@functools.lru_cache(maxsize=8)
+def _basis(days: int):
+    """
+    Scenario-independent float32 basis vectors, shared read-only by every host
+    with the same horizon: yearly cosine, weekly sine and the yearly noise
+    envelope (cos365 + 1) / 2 used by the seasonal generator.
+    """
+    t = np.arange(days)
+    year_cos = np.cos(YEAR_FREQ * t)
+    week_sin = np.sin(WEEK_FREQ * t).astype(np.float32)
+    year_envelope = ((year_cos + 1) * 0.5).astype(np.float32)
+    year_cos = year_cos.astype(np.float32)
+    for arr in (year_cos, week_sin, year_envelope):
+        arr.setflags(write=False)
+    return year_cos, week_sin, year_envelope
+
+@njit(inline='always')
+def _clip_pct(v):
+    return 0.0 if v < 0.0 else (100.0 if v > 100.0 else v)
+
+@njit([_F4(_F8, _F8, _F8, _F8, _F8, _F4_RO, _F4_RO, _F4, _F4, _F4),
+       _F4_A(_F8, _F8, _F8, _F8, _F8, _F4_RO, _F4_RO, _F4_A, _F4_A, _F4_A)],
+      fastmath=True, nogil=True, cache=True)
+def _steady_kernel(base, mean_g, std_g, noise_std, season_amp, year_cos, week_sin,
+                   step_z, noise_z, out):
+    weekly_amp = season_amp / 4.0
+    trend = 0.0
+    for i in range(out.shape[0]):
+        trend += mean_g + std_g * step_z[i]
+        yearly = season_amp * year_cos[i]
+        weekly = weekly_amp * week_sin[i]
+        out[i] = _clip_pct(base + trend + yearly + weekly + noise_std * noise_z[i])
+    return out
+
+@njit(_F4_2D(types.Array(_F8, 2, 'C'), _F4_RO, _F4_RO, _F4_2A, _F4_2A, _F4_2D),
+      parallel=True, fastmath=True, nogil=True, cache=True)
+def _steady_fleet_kernel(params, year_cos, week_sin, step_z, noise_z, out):
+    # Host rows are independent: prange hands each thread whole rows of the tile
+    for h in prange(out.shape[0]):
+        _steady_kernel(params[h, 0], params[h, 1], params[h, 2], params[h, 3], params[h, 4],
+                       year_cos, week_sin, step_z[h], noise_z[h], out[h])
+    return out
+
+@njit(_F4(_F8, _F4_RO, _F4_RO, _F4_RO, _F4, _F4, _F4), fastmath=True, nogil=True, cache=True)
+def _seasonal_kernel(amp_multiplier, year_cos, week_sin, year_envelope, step_z, noise_z, out):
+    yearly_amp = 15.0 * amp_multiplier
+    trend = 0.0
+    for i in range(out.shape[0]):
+        trend += 0.008 + 0.02 * step_z[i]
+        weekly = 5.0 * week_sin[i]
+        noise = (2.0 + 3.0 * year_envelope[i]) * noise_z[i]
+        out[i] = _clip_pct(30.0 + trend + yearly_amp * year_cos[i] + weekly + noise)
+    return out
+
+@njit(_F4(_I8, _I8, _F4, _F4, _F4, _F4), fastmath=True, nogil=True, cache=True)
+def _burst_kernel(spike_idx, durations, magnitudes, step_z, noise_z, out):
+    days = out.shape[0]
+    n_spikes = spike_idx.shape[0]
+    out[:] = 0.0
+    # Sorted, disjoint windows: a spike ends at its duration, the next spike or the horizon
+    for k in range(n_spikes):
+        limit = spike_idx[k + 1] if k + 1 < n_spikes else days
+        end = min(spike_idx[k] + durations[k], limit)
+        for i in range(spike_idx[k], end):
+            out[i] = magnitudes[k]
+    trend = 0.0
+    for i in range(days):
+        trend += 0.005 + 0.01 * step_z[i]
+        out[i] = _clip_pct(15.0 + trend + out[i] + 1.5 * noise_z[i])
+    return out
+
+@njit(_I8(types.int64, _I8), nogil=True, cache=True)
+def _floyd_sample(days, draws):
+    # Floyd's algorithm: k distinct sorted indices in [0, days) from k bounded draws
+    # (draws[m] uniform in [0, days - k + m]), with no length-days index pool
+    k = draws.shape[0]
+    picked = np.empty(k, dtype=np.int64)
+    for m in range(k):
+        t = draws[m]
+        for q in range(m):
+            if picked[q] == t:
+                t = days - k + m
+                break
+        picked[m] = t
+    picked.sort()
+    return picked
+
+@njit(_F4(_F8, _F4, _F4), fastmath=True, nogil=True, cache=True)
+def _idle_kernel(mean_val, noise_z, out):
+    for i in range(out.shape[0]):
+        out[i] = _clip_pct(mean_val + 0.5 * noise_z[i])
+    return out
+
+@njit(_F4(_F8, _F4_RO, _F4, _F4), fastmath=True, nogil=True, cache=True)
+def _breach_kernel(growth_rate, year_cos, noise_z, out):
+    # 25 * exp(growth_rate * i / 10) as a running product: one exp per host, not per day
+    ratio = math.exp(growth_rate * 0.1)
+    curve = 25.0
+    for i in range(out.shape[0]):
+        out[i] = _clip_pct(curve + 5.0 * year_cos[i] + 2.5 * noise_z[i])
+        curve *= ratio
+    return out
 
 # =============================================================================
 # 1. GENERATOR CORE: STEADY GROWTH
 # =============================================================================
-def generate_steady_growth(days: int, variant: str = 'NORMAL', base_seed: int = 0) -> np.ndarray:  
+@functools.lru_cache(maxsize=8)
+def _steady_bounds(variant: str, days: int):
+    """
+    (lows, highs) for base, daily growth, growth volatility, noise and season
+    amplitude; growth is pre-scaled to a per-day rate for the given horizon.
+    """
+    cfg = GENERATOR_CONFIG[Scenario.STEADY_GROWTH][variant]
+    keys = ("base_range", "growth_total_range", "std_growth", "noise_std", "season_amp")
+    lows, highs = (np.array([cfg[k][j] for k in keys], dtype=np.float64) for j in (0, 1))
+    lows[1] /= days
+    highs[1] /= days
+    for arr in (lows, highs):
+        arr.setflags(write=False)
+    return lows, highs
+
+def _normals(rng: np.random.Generator, rows: int, days: int, scratch=None) -> np.ndarray:
+    """
+    (rows, days) float32 standard normals, drawn into the caller's scratch buffer
+    when one is supplied so host loops do not allocate a fresh block per call.
+    """
+    if scratch is None:
+        return rng.standard_normal((rows, days), dtype=np.float32)
+    block = scratch[:rows * days].reshape(rows, days)
+    rng.standard_normal(dtype=np.float32, out=block)
+    return block
+
+def generate_steady_growth(days: int, variant: str = 'NORMAL', base_seed: int = 0,
+                           rng=None, scratch=None, out=None) -> np.ndarray:  
     """
     Simulates long-term linear drift combined with annual and weekly seasonality.
     Standardized to use direct dictionary lookups for performance.
+    Every generator accepts an optional shared rng (overriding base_seed), a
+    float32 scratch of at least 2 * days for its normals and a float32 out row;
+    see run_all_hosts.
     """
-    np.random.seed(base_seed)
-    cfg = GENERATOR_CONFIG[Scenario.STEADY_GROWTH][variant]
+    rng = rng if rng is not None else np.random.default_rng(base_seed)
     
-    # DNA Extraction
-    base = np.random.uniform(*cfg["base_range"])
-    mean_daily_growth = np.random.uniform(*cfg["growth_total_range"]) / days
-    std_daily_growth = np.random.uniform(*cfg["std_growth"])
-    noise_std = np.random.uniform(*cfg["noise_std"])
-    season_amp = np.random.uniform(*cfg["season_amp"])
+    # DNA Extraction: all five parameters in a single vectorized draw
+    lows, highs = _steady_bounds(variant, days)
+    base, mean_daily_growth, std_daily_growth, noise_std, season_amp = rng.uniform(lows, highs)
     
-    t = np.arange(days)
+    # Component Synthesis (trend + seasons + noise fused in one pass)
+    year_cos, week_sin, _ = _basis(days)
+    step_z, noise_z = _normals(rng, 2, days, scratch)
+    out = np.empty(days, dtype=np.float32) if out is None else out
+    return _steady_kernel(base, mean_daily_growth, std_daily_growth, noise_std, season_amp,
+                          year_cos, week_sin, step_z, noise_z, out)
+
+def generate_steady_growth_batch(days: int, seeds, variant: str = 'NORMAL') -> np.ndarray:
+    """
+    Fleet variant of generate_steady_growth: synthesizes one host per seed as a
+    single (n_hosts, days) float32 matrix through one fused kernel call per tile.
+    The seed list drives one shared Generator; rows are reproducible per list,
+    not bit-identical to per-host calls.
+    """
+    seeds = np.asarray(seeds, dtype=np.int64)
+    n_hosts = seeds.size
+    rng = np.random.default_rng(seeds)
     
-    # Component Synthesis
-    daily_steps = np.random.normal(mean_daily_growth, std_daily_growth, days)  
-    trend = np.cumsum(daily_steps)  
-    yearly_season = season_amp * np.cos(2 * np.pi * t / 365)  
-    weekly_season = (season_amp / 4) * np.sin(2 * np.pi * t / 7)  
-    noise = np.random.normal(0, noise_std, days)  
-      
-    util = base + trend + yearly_season + weekly_season + noise  
-    return np.clip(util, 0, 100).astype(np.float32)
+    # DNA Extraction: one (n_hosts, 5) draw, split into columns that broadcast over days
+    lows, highs = _steady_bounds(variant, days)
+    params = rng.uniform(lows, highs, size=(n_hosts, lows.size))
+    
+    # Component Synthesis in L2-sized host tiles: one reused scratch block holds the
+    # step and noise normals for a tile, and the fused steady kernel folds trend,
+    # seasons, noise and clip into a single pass per host row
+    year_cos, week_sin, _ = _basis(days)
+    # (L2 is per core, so the tile grows with the prange thread count)
+    tile = max(1, L2_TILE_BYTES // (2 * days * 4)) * get_num_threads()
+    out = np.empty((n_hosts, days), dtype=np.float32)
+    scratch = np.empty((min(tile, n_hosts), 2, days), dtype=np.float32)
+    
+    for start in range(0, n_hosts, tile):
+        rows = slice(start, start + tile)
+        block = out[rows]
+        z = scratch[:block.shape[0]]
+        rng.standard_normal(dtype=np.float32, out=z)
+        _steady_fleet_kernel(params[rows], year_cos, week_sin, z[:, 0], z[:, 1], block)
+    return out
 
 # =============================================================================
 # 2. GENERATOR CORE: SEASONAL & BURST
 # =============================================================================
-def generate_seasonal(days: int, variant: str = 'BALANCED', base_seed: int = 0) -> np.ndarray:  
+def generate_seasonal(days: int, variant: str = 'BALANCED', base_seed: int = 0,
+                      rng=None, scratch=None, out=None) -> np.ndarray:  
     """Simulates cyclical workloads (e.g., retail peaks) with amplified noise envelopes."""
-    np.random.seed(base_seed)
+    rng = rng if rng is not None else np.random.default_rng(base_seed)
     amp_multiplier = 2.0 if variant == 'EXTREME' else 1.0
-    t = np.arange(days)
-    
-    base = 30 
-    trend = np.cumsum(np.random.normal(0.008, 0.02, days))
-    yearly_season = (15 * amp_multiplier) * np.cos(2 * np.pi * t / 365)
-    weekly_season = 5 * np.sin(2 * np.pi * t / 7)
     
-    noise_envelope = (np.cos(2 * np.pi * t / 365) + 1) / 2
-    noise = np.random.normal(0, 2 + (3 * noise_envelope), days)
-      
-    util = base + trend + yearly_season + weekly_season + noise
-    return np.clip(util, 0, 100).astype(np.float32)
+    # Base 30 + drift + yearly/weekly cycles, noise widening at the yearly peak
+    year_cos, week_sin, year_envelope = _basis(days)
+    step_z, noise_z = _normals(rng, 2, days, scratch)
+    out = np.empty(days, dtype=np.float32) if out is None else out
+    return _seasonal_kernel(amp_multiplier, year_cos, week_sin, year_envelope, step_z, noise_z, out)
 
-def generate_burst(days: int, variant: str = 'MODERATE', base_seed: int = 0) -> np.ndarray:  
+def generate_burst(days: int, variant: str = 'MODERATE', base_seed: int = 0,
+                   rng=None, scratch=None, out=None) -> np.ndarray:  
     """Simulates random compute spikes (e.g., batch jobs/backups) on a background trend."""
-    np.random.seed(base_seed)
-    t = np.arange(days)
+    rng = rng if rng is not None else np.random.default_rng(base_seed)
     
-    trend = np.cumsum(np.random.normal(0.005, 0.01, days))
+    # One normal block feeds both the trend steps and the noise floor
+    step_z, noise_z = _normals(rng, 2, days, scratch)
     num_spikes = 35 if variant == 'EXTREME' else 15
-    spike_indices = np.random.choice(t, size=num_spikes, replace=False)
+    # O(num_spikes) sampling without replacement: rng.choice still builds a length-days
+    # pool for short horizons, Floyd's algorithm needs one bounded draw per spike
+    spike_indices = _floyd_sample(days, rng.integers(0, np.arange(days - num_spikes, days) + 1))
+    
+    durations = rng.integers(1, 4, size=num_spikes)
+    magnitudes = rng.random(num_spikes, dtype=np.float32) * 35 + 40
     
-    spikes = np.zeros(days)
-    for idx in spike_indices:
-        duration = np.random.randint(1, 4)
-        magnitude = np.random.uniform(40, 75)
-        spikes[idx : idx + duration] = magnitude
-        
-    util = 15 + trend + spikes + np.random.normal(0, 1.5, days)
-    return np.clip(util, 0, 100).astype(np.float32)
+    # Spike painting, trend, noise and clip fused in one compiled pass
+    out = np.empty(days, dtype=np.float32) if out is None else out
+    return _burst_kernel(spike_indices, durations, magnitudes, step_z, noise_z, out)
 
 # =============================================================================
 # 3. GENERATOR CORE: IDLE & BREACH
 # =============================================================================
-def generate_low_idling(days: int, variant: str = 'STABLE', base_seed: int = 0) -> np.ndarray:  
+def generate_low_idling(days: int, variant: str = 'STABLE', base_seed: int = 0,
+                        rng=None, scratch=None, out=None) -> np.ndarray:  
     """Simulates underutilized legacy assets or standby nodes."""
-    np.random.seed(base_seed)
-    mean_val = 5 if variant == 'STABLE' else 10
-    idle_floor = np.random.normal(mean_val, 0.5, days)
-    return np.clip(idle_floor, 0, 100).astype(np.float32)
+    rng = rng if rng is not None else np.random.default_rng(base_seed)
+    mean_val = 5.0 if variant == 'STABLE' else 10.0
+    out = np.empty(days, dtype=np.float32) if out is None else out
+    return _idle_kernel(mean_val, _normals(rng, 1, days, scratch)[0], out)
 
-def generate_capacity_breach(days: int, variant: str = 'IMMINENT', base_seed: int = 0) -> np.ndarray:  
+def generate_capacity_breach(days: int, variant: str = 'IMMINENT', base_seed: int = 0,
+                             rng=None, scratch=None, out=None) -> np.ndarray:  
     """Simulates runaway exponential growth requiring urgent capacity intervention."""
-    np.random.seed(base_seed)
-    t = np.arange(days)
+    rng = rng if rng is not None else np.random.default_rng(base_seed)
     growth_rate = 0.006 if variant == 'IMMINENT' else 0.009
-    curve = 25 * np.exp(growth_rate * t / 10)
-    
-    util = curve + (5 * np.cos(2 * np.pi * t / 365)) + np.random.normal(0, 2.5, days)
-    return np.clip(util, 0, 100).astype(np.float32)
+    year_cos, _, _ = _basis(days)
+    out = np.empty(days, dtype=np.float32) if out is None else out
+    return _breach_kernel(growth_rate, year_cos, _normals(rng, 1, days, scratch)[0], out)
 
 # =============================================================================
 # DISPATCHER & DIAGNOSTIC LAB
@@ -127,34 +305,100 @@ GENERATORS = {
     Scenario.CAPACITY_BREACH: generate_capacity_breach
 }
 
-def run_diagnostic_lab(scenario_enum: Scenario, test_days: int = 1095):
+# Fleet Dispatcher: preferred over GENERATORS when a whole list of seeds is at hand
+BATCH_GENERATORS = {
+    Scenario.STEADY_GROWTH: generate_steady_growth_batch
+}
+
+def run_all_hosts(scenario_enum: Scenario, n_hosts: int, days: int, variant: str, base_seed: int = 0) -> np.ndarray:
+    """
+    Per-host dispatcher for scenarios without a fleet kernel: one Generator and one
+    normal scratch buffer are shared across the whole loop, so host i only pays
+    for its own output row.
+    """
+    gen_func = GENERATORS[scenario_enum]
+    rng = np.random.default_rng(base_seed)
+    scratch = np.empty(2 * days, dtype=np.float32)
+    
+    out = np.empty((n_hosts, days), dtype=np.float32)
+    for i in range(n_hosts):
+        gen_func(days, variant=variant, rng=rng, scratch=scratch, out=out[i])
+    return out
+
+def generate_many(scenario_enum: Scenario, n_hosts: int, days: int, seeds, variants) -> np.ndarray:
+    """
+    Per-host seeds and variants into one preallocated (n_hosts, days) float32 matrix.
+    Rows are bit-identical to individual generator calls with the same seed; the
+    only per-host work is the generator itself, which writes into its row view.
+    """
+    gen_func = GENERATORS[scenario_enum]
+    scratch = np.empty(2 * days, dtype=np.float32)
+    
+    out = np.empty((n_hosts, days), dtype=np.float32)
+    for h in range(n_hosts):
+        gen_func(days, variant=variants[h], base_seed=int(seeds[h]), scratch=scratch, out=out[h])
+    return out
+
+def generate_variant_matrix(scenario_enum: Scenario, days: int, variants, base_seed: int = 0) -> np.ndarray:
+    """
+    Side-by-side variants for one scenario as a single (len(variants), days) matrix.
+    Every row is reseeded from base_seed, so variants differ only in their DNA and
+    share one scratch buffer and one output allocation.
+    """
+    gen_func = GENERATORS[scenario_enum]
+    scratch = np.empty(2 * days, dtype=np.float32)
+    
+    out = np.empty((len(variants), days), dtype=np.float32)
+    for i, variant in enumerate(variants):
+        gen_func(days, variant=variant, base_seed=base_seed, scratch=scratch, out=out[i])
+    return out
+
+@functools.lru_cache(maxsize=128)
+def _cached_variant_matrix(scenario_enum: Scenario, days: int, variants: tuple, base_seed: int) -> np.ndarray:
+    """
+    Lab-only memo of generate_variant_matrix keyed on (scenario, days, variants, seed).
+    The matrix is returned read-only; callers copy before mutating. Production host
+    seeds never repeat, so the host factory calls the generators directly.
+    """
+    series = generate_variant_matrix(scenario_enum, days, variants, base_seed)
+    series.setflags(write=False)
+    return series
+
+def run_diagnostic_lab(scenario_enum: Scenario, test_days: int = 1095, plot: bool = True,
+                       seed: int = None, dpi: int = 100):
     """
     VALIDATION SUITE: Generates comparative plots for Scenario Variants.
     Ensures mathematical logic matches visual expectations before full-scale generation.
+    Returns a (2, test_days) matrix of [common, rare] rows; with plot=False it is
+    returned without touching pandas/matplotlib. Passing a seed replays (and reuses)
+    an earlier run instead of drawing a fresh one. dpi defaults to screen resolution;
+    publication callers can raise it.
     """
-    import matplotlib.pyplot as plt
-    import pandas as pd
-
-    date_range = pd.date_range(start=TIME_START, periods=test_days, freq='D')
-    seed = random.randint(10000, 99999)
+    if seed is None:
+        seed = int(np.random.SeedSequence().generate_state(1)[0])
     
     variants = SCENARIO_VARIANTS[scenario_enum]
     v_common = variants['common']
     v_rare = variants['rare']
 
-    gen_func = GENERATORS[scenario_enum]
-    series_common = gen_func(test_days, variant=v_common, base_seed=seed)
-    series_rare = gen_func(test_days, variant=v_rare, base_seed=seed)
+    series = _cached_variant_matrix(scenario_enum, test_days, (v_common, v_rare), seed)
+
+    if not plot:
+        return series
+
+    import pandas as pd
+    from horizonscale.lib.utils import agg_canvas
+
+    date_range = pd.date_range(start=TIME_START, periods=test_days, freq='D')
 
-    plt.style.use('seaborn-v0_8-muted')
-    fig, ax = plt.subplots(figsize=(12, 6))
-    ax.plot(date_range, series_common, label=f"COMMON: {v_common}")
-    ax.plot(date_range, series_rare, label=f"RARE: {v_rare}", color='firebrick', alpha=0.7)
+    fig, ax = agg_canvas((12, 6), style='seaborn-v0_8-muted')
+    ax.cla()
+    ax.plot(date_range, series[0], label=f"COMMON: {v_common}")
+    ax.plot(date_range, series[1], label=f"RARE: {v_rare}", color='firebrick', alpha=0.7)
     ax.set_title(f"Diagnostic: {scenario_enum.name} Behavioral Comparison")
     ax.set_ylabel("Utilization %")
     ax.legend()
     
-    PLOTS_DIR.mkdir(parents=True, exist_ok=True)
-    plt.savefig(PLOTS_DIR / f"diagnostic_{scenario_enum.name.lower()}.png")
-    plt.close()
-    logger.info(f"DIAGNOSTIC COMPLETE: {scenario_enum.name}")
\ No newline at end of file
+    fig.savefig(PLOTS_DIR / f"diagnostic_{scenario_enum.name.lower()}.png", dpi=dpi)
+    logger.info(f"DIAGNOSTIC COMPLETE: {scenario_enum.name}")
+    return series
\ No newline at end of file
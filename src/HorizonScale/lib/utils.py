@@ -17,21 +17,26 @@ Success (Exit Criteria):
     - Prevents memory leaks during batch visualization via automated figure disposal.
 """
 
+import atexit
+import functools
+import logging
+import math
 import os
 import sys
+import duckdb
 import numpy as np
 import pandas as pd
 import matplotlib.pyplot as plt
 from pathlib import Path
-from datetime import datetime, timedelta
-from typing import Tuple, List, Dict
-from sklearn.metrics import mean_absolute_percentage_error, mean_squared_error
+from datetime import datetime
+from typing import Tuple, Dict
 
-from horizonscale.lib.config import LOG_DIR, PLOTS_DIR
-from horizonscale.lib.logging import init_root_logging
+from horizonscale.lib.config import (
+    DB_PATH, LOG_DIR, PLOTS_DIR, DUCKDB_THREADS, DUCKDB_MEMORY_LIMIT, DUCKDB_TEMP_DIR
+)
 
-# Initialize logger for the utility module itself
-logger = init_root_logging("utils_module")
+# Library module: entry-point scripts own the root logger configuration
+logger = logging.getLogger(__name__)
 
 # =============================================================================
 # 1. ENVIRONMENT & PATH UTILITIES
@@ -52,23 +57,23 @@ def get_project_root() -> Path:
 # 2. VISUALIZATION UTILITIES
 # =============================================================================
 
-def save_plot(fig: plt.Figure, name: str):
+def save_plot(fig: plt.Figure, name: str, dpi: int = 100):
     """
     Saves a Matplotlib figure with an enterprise-standard timestamp prefix.
+    Diagnostic resolutions (dpi <= 200) keep the figure's own extent; only
+    publication renders pay the extra draw pass of bbox_inches='tight'.
     
     Exit Criteria:
-        - Directory existence is verified.
+        - PLOTS_DIR already exists (created by config at import).
         - Figure is closed after saving to free system memory.
         - File existence is asserted post-operation.
     """
-    PLOTS_DIR.mkdir(parents=True, exist_ok=True)
-    
     timestamp = datetime.now().strftime("%Y-%m-%d_%H%M")
     filename = f"{timestamp}_{name}.png"
     save_path = PLOTS_DIR / filename
     
     try:
-        fig.savefig(save_path, bbox_inches='tight')
+        fig.savefig(save_path, dpi=dpi, bbox_inches='tight' if dpi > 200 else None)
         plt.close(fig)  # Crucial for memory management in batch processing
         
         if not save_path.exists():
@@ -79,6 +84,23 @@ def save_plot(fig: plt.Figure, name: str):
         logger.error(f"VISUALIZATION FAILURE: Could not save {name}. Error: {str(e)}")
         raise
 
+@functools.lru_cache(maxsize=None)
+def agg_canvas(figsize: tuple, style: str = None):
+    """
+    One Agg-backed Figure/Axes per process and figsize, reused by every plot drawn
+    on it (callers clear the Axes). No pyplot state machine, no per-plot Figure/font
+    setup; an optional Matplotlib style is applied once, before the Figure is built.
+    """
+    import matplotlib.style
+    from matplotlib.figure import Figure
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+
+    if style:
+        matplotlib.style.use(style)
+    fig = Figure(figsize=figsize)
+    FigureCanvasAgg(fig)
+    return fig, fig.subplots()
+
 # =============================================================================
 # 3. ANALYTICAL & TEMPORAL HELPERS
 # =============================================================================
@@ -86,37 +108,127 @@ def save_plot(fig: plt.Figure, name: str):
 def evaluate_model(actual: np.ndarray, forecast: np.ndarray) -> Dict[str, float]:
     """
     Calculates standard forecasting metrics: MAPE and RMSE.
+    Matches sklearn's definitions (MAPE denominator floored at float64 eps)
+    using one reusable float64 residual buffer.
     """
-    mape = mean_absolute_percentage_error(actual, forecast)
-    rmse = np.sqrt(mean_squared_error(actual, forecast))
+    actual = np.asarray(actual, dtype=np.float64).ravel()
+    diff = np.subtract(actual, np.asarray(forecast, dtype=np.float64).ravel())
+    
+    rmse = math.sqrt(np.dot(diff, diff) / diff.size)
+    np.abs(diff, out=diff)
+    diff /= np.maximum(np.abs(actual), np.finfo(np.float64).eps)
+    mape = diff.mean()
     
     return {
         "MAPE": round(float(mape), 4),
         "RMSE": round(float(rmse), 4)
     }
 
-def generate_time_dimensions(start_date: str, end_date: str) -> Tuple[List[datetime], List[str]]:
+def residual_intervals(model, forecast: pd.DataFrame, z: float = 1.96) -> pd.DataFrame:
+    """
+    Deterministic yhat_lower/upper for Prophet forecasts made with uncertainty_samples=0:
+    yhat +/- z * sigma, where sigma is the std of the in-sample residuals.
+    The forecast must lead with the model's history rows (include_history=True).
+    """
+    history_y = model.history['y'].to_numpy()
+    sigma = float(np.std(history_y - forecast['yhat'].to_numpy()[:history_y.size]))
+    forecast['yhat_lower'] = forecast['yhat'] - z * sigma
+    forecast['yhat_upper'] = forecast['yhat'] + z * sigma
+    return forecast
+
+def tune_duckdb(con):
+    """
+    Applies the heavy-workload engine settings to a DuckDB connection:
+    physical-core threads, no insertion-order guarantee (callers ORDER BY when
+    they need it), a memory ceiling, and a spill directory for larger-than-RAM steps.
+    """
+    con.execute(f"PRAGMA threads={DUCKDB_THREADS}")
+    con.execute("PRAGMA preserve_insertion_order=false")
+    if DUCKDB_MEMORY_LIMIT:
+        con.execute(f"PRAGMA memory_limit='{DUCKDB_MEMORY_LIMIT}'")
+    con.execute(f"PRAGMA temp_directory='{DUCKDB_TEMP_DIR.as_posix()}'")
+    return con
+
+@functools.cache
+def get_conn(tuned: bool = False) -> duckdb.DuckDBPyConnection:
+    """
+    Process-wide DuckDB connection to DB_PATH: opened on first use instead of
+    connect/close per helper, and closed once at interpreter exit.
+    tuned=True applies the tune_duckdb engine settings for heavy stages.
+    """
+    con = duckdb.connect(str(DB_PATH))
+    if tuned:
+        tune_duckdb(con)
+    atexit.register(con.close)
+    return con
+
+def register_parquet_view(con, name: str, parquet_path) -> None:
+    """
+    Points a DuckDB view at a Parquet file so readers scan it in place (projection and
+    row-group pushdown) instead of copying it into a table. Any table or view of the
+    same name left by earlier runs is dropped first.
+    """
+    existing = con.execute(
+        "SELECT table_type FROM information_schema.tables WHERE table_name = ?", [name]
+    ).fetchone()
+    if existing:
+        con.execute(f"DROP {'VIEW' if existing[0] == 'VIEW' else 'TABLE'} {name}")
+    con.execute(f"CREATE VIEW {name} AS SELECT * FROM read_parquet('{Path(parquet_path).as_posix()}')")
+
+def generate_time_dimensions(start_date: str, end_date: str) -> Tuple[np.ndarray, np.ndarray]:
     """
     Generates a contiguous daily calendar and YYYYMM strings for database seeding.
     
     Input:
         start_date/end_date in 'YYYY-MM-DD' format.
+    Output:
+        (datetime64[D] array, '<U6' YYYYMM array); call .tolist() if a consumer needs lists.
     """
-    start = datetime.strptime(start_date, "%Y-%m-%d")
-    end = datetime.strptime(end_date, "%Y-%m-%d")
-    delta = end - start
+    start = np.datetime64(start_date, 'D')
+    end = np.datetime64(end_date, 'D')
+    
+    # Calendar and month keys are built in C: no per-day datetime objects or strftime calls
+    dates = np.arange(start, end + np.timedelta64(1, 'D'), dtype='datetime64[D]')
     
-    dates = [start + timedelta(days=i) for i in range(delta.days + 1)]
-    yearmonths = [d.strftime("%Y%m") for d in dates]
+    # YYYYMM via integer arithmetic on months-since-epoch, formatted in one cast
+    months = dates.astype('datetime64[M]').astype(np.int64)
+    yearmonths = ((1970 + months // 12) * 100 + months % 12 + 1).astype('U6')
     
     return dates, yearmonths
 
+def _stats_pass(a):
+    # Sums are shifted by the first sample so sum-of-squares stays well conditioned
+    shift = a[0]
+    s = 0.0
+    ss = 0.0
+    m = a[0]
+    for i in range(a.size):
+        v = a[i]
+        d = v - shift
+        s += d
+        ss += d * d
+        # NaN wins the max, matching np.max (a bare v > m would skip it)
+        if v > m or v != v:
+            m = v
+    n = a.size
+    mean_d = s / n
+    var = max(ss / n - mean_d * mean_d, 0.0)
+    return shift + mean_d, math.sqrt(var), m
+
+@functools.cache
+def _stats_kernel():
+    """Compiles _stats_pass on first use so stages that never profile skip the numba import."""
+    from numba import njit
+    return njit(cache=True)(_stats_pass)
+
 def compute_utilization_stats(series: np.ndarray) -> Dict[str, float]:
     """
     Provides a rapid descriptive statistical profile of a utilization series.
+    Mean, population std and max come from one compiled pass over the data.
     """
+    mean_util, std_util, max_util = _stats_kernel()(np.ravel(series))
     return {
-        "mean_util": round(float(np.mean(series)), 2),
-        "std_util": round(float(np.std(series)), 2),
-        "max_util": round(float(np.max(series)), 2)
-    }
\ No newline at end of file
+        "mean_util": round(float(mean_util), 2),
+        "std_util": round(float(std_util), 2),
+        "max_util": round(float(max_util), 2)
+    }
@@ -12,7 +12,7 @@ Genesis (Entrance Criteria):
     - DuckDB database must be initialized with the 'hosts' inventory.
 
 Success (Exit Criteria):
-    - 'processed_data' table is populated with standardized 'ds' and 'y' columns.
+    - 'processed_data' view (over the refined Parquet) exposes standardized 'ds' and 'y' columns.
     - Audit verifies 100% retention of all 10 behavioral DNA varieties.
     - Timestamp normalization is applied to all ingested telemetry.
 """
@@ -21,13 +21,20 @@ import duckdb
 from pathlib import Path
 import polars as pl
 from horizonscale.lib.config import (
-    DB_PATH, LEGACY_INPUT_DIR, RESOURCE_FILE_PREFIXES
+    DB_PATH, LEGACY_INPUT_DIR, MASTER_DATA_DIR, RESOURCE_FILE_PREFIXES, LEGACY_CSV_COLUMNS
 )
 from horizonscale.lib.logging import init_root_logging
+from horizonscale.lib.utils import tune_duckdb, register_parquet_view
 
 # Initialize specialized logging
 logger = init_root_logging(Path(__file__).stem)
 
+# Refined ABT lands as columnar Parquet; DuckDB exposes it as a view
+PROCESSED_PARQUET = MASTER_DATA_DIR / "processed_data.parquet"
+
+# Legacy CSV layout types (DuckDB names in config) mapped to Polars dtypes
+POLARS_CSV_TYPES = {'DATE': pl.Date, 'VARCHAR': pl.Utf8, 'DOUBLE': pl.Float64, 'BIGINT': pl.Int64}
+
 def check_genesis_criteria():
     """
     ENTRANCE AUDIT: Validates the presence of raw legacy files before 
@@ -52,11 +59,13 @@ def validate_refinery_exit(con: duckdb.DuckDBPyConnection):
     """
     logger.info("--- Validating Refinery Exit Criteria ---")
     
-    # Audit: Count distinct hosts per behavioral profile
+    # Audit: Count ingested hosts per behavioral profile
+    # Aggregates on the small 'hosts' dimension and semi-joins fact existence,
+    # instead of a per-group COUNT(DISTINCT) hash-set over every telemetry row
     audit_df = con.execute("""
-        SELECT h.scenario, h.variant, COUNT(DISTINCT p.host_id) as host_count
-        FROM processed_data p
-        JOIN hosts h ON p.host_id = h.node_name
+        SELECT h.scenario, h.variant, COUNT(*) as host_count
+        FROM hosts h
+        WHERE h.node_name IN (SELECT DISTINCT host_id FROM processed_data)
         GROUP BY 1, 2 ORDER BY 1, 2
     """).pl()
     
@@ -86,40 +95,36 @@ def run_refinery():
     """
     check_genesis_criteria()
     
-    con = duckdb.connect(str(DB_PATH))
-    
-    # IDEMPOTENCY: Reset landing zone
-    con.execute("DROP TABLE IF EXISTS processed_data")
-    
-    # SCHEMA DEFINITION: ds and y are required for Prophet compatibility
-    con.execute("""
-        CREATE TABLE processed_data (
-            ds TIMESTAMP,
-            host_id VARCHAR,
-            resource VARCHAR,
-            y DOUBLE,
-            cap DOUBLE
-        )
-    """)
-
-    # STEP 1: MASSIVE INGESTION
-    # Iterates through resource types, globbing all monthly files into one table
+    # STEP 1: STREAMING INGESTION
+    # One lazy scan per resource type, each globbing all of its monthly files.
+    # DYNAMIC NORMALIZATION: casts dates to timestamps and renames
+    # resource-specific columns to 'y' (ds and y are required for Prophet).
+    # y is a [0, 100] percentage, so FLOAT32 halves every downstream scan at ample precision
+    logger.info(f"INGESTING: Processing {', '.join(RESOURCE_FILE_PREFIXES)} legacy streams...")
+    scans = []
     for res, prefix in RESOURCE_FILE_PREFIXES.items():
-        logger.info(f"INGESTING: Processing {res} legacy streams...")
         path_pattern = str(LEGACY_INPUT_DIR / "**" / f"{prefix}_*.csv")
-        
-        # DYNAMIC NORMALIZATION: 
-        # Casts strings to timestamps and renames resource-specific columns to 'y'
-        con.execute(f"""
-            INSERT INTO processed_data
-            SELECT 
-                CAST(date AS TIMESTAMP) as ds,
-                host_id,
-                '{res}' as resource,
-                {res}_p95 as y,
-                100.0 as cap
-            FROM read_csv_auto('{path_pattern}')
-        """)
+        # EXPLICIT SCHEMA: typed columns + header, no per-file type inference
+        schema = {name: POLARS_CSV_TYPES[dtype] for name, dtype in LEGACY_CSV_COLUMNS[res].items()}
+        scans.append(
+            pl.scan_csv(path_pattern, schema=schema).select(
+                pl.col('date').cast(pl.Datetime('us')).alias('ds'),
+                pl.col('host_id'),
+                pl.lit(res).alias('resource'),
+                pl.col(f'{res}_p95').cast(pl.Float32).alias('y'),
+                pl.lit(100.0).alias('cap'),
+            )
+        )
+    
+    # SINK: the streaming engine writes the union straight to zstd Parquet with
+    # flat memory, and no rows pass through DuckDB's WAL or checkpointer
+    pl.concat(scans).sink_parquet(PROCESSED_PARQUET, compression='zstd', row_group_size=1_000_000)
+    
+    # SCHEMA DEFINITION: downstream stages query 'processed_data' as before
+    con = tune_duckdb(duckdb.connect(str(DB_PATH)))
+    
+    # IDEMPOTENCY: Reset landing zone (older runs materialized a table)
+    register_parquet_view(con, "processed_data", PROCESSED_PARQUET)
 
     # STEP 2: POST-REFINERY AUDIT
     validate_refinery_exit(con)
@@ -4,7 +4,7 @@ Author: Sean L. Girgis
 
 Purpose:
     The "Forecasting Laboratory." This script selects 10 representative hosts—one 
-    from each behavioral variety—and projects their utilization 180 days into 
+    from each behavioral variety—and projects every resource of each 180 days into 
     the future using Facebook Prophet with logistic constraints.
 
 Genesis (Entrance Criteria):
@@ -13,34 +13,39 @@ Genesis (Entrance Criteria):
 
 Success (Exit Criteria):
     - Forecast results (yhat, bounds) are persisted to the 'forecasts' table.
-    - 10 visualization PNGs are exported to the plots/forecasts directory.
+    - 40 visualization PNGs (10 hosts x 4 resources) are exported to the plots/forecasts directory.
     - All projections strictly observe the [0, 100] utilization envelope.
 """
 
+import logging
+import os
+import matplotlib
 import duckdb
 import pandas as pd
 from prophet import Prophet
-import random
-import matplotlib.pyplot as plt
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 from horizonscale.lib.config import (
-    DB_PATH, PLOTS_DIR, FORECAST_HORIZON, Scenario, SCENARIO_VARIANTS
+    PLOTS_DIR, FORECAST_HORIZON, Scenario, SCENARIO_VARIANTS, RESOURCE_FILE_PREFIXES
 )
 from horizonscale.lib.logging import init_root_logging
+from horizonscale.lib.utils import residual_intervals, agg_canvas, get_conn
 
-# Initialize specialized logging
-logger = init_root_logging(Path(__file__).stem)
+# Root logger handle only: handlers are attached in run_forecasting_lab, so spawned
+# workers re-importing this module never reopen (and truncate) the stage log
+logger = logging.getLogger()
+
+# Gallery for the lab's forecast plots (written by the worker processes)
+FORECAST_PLOT_DIR = PLOTS_DIR / "forecasts"
 
 def check_genesis_criteria():
     """
     ENTRANCE AUDIT: Verifies the presence of the Analytical Base Table (ABT).
     """
     logger.info("--- Validating Forecasting Genesis ---")
-    con = duckdb.connect(str(DB_PATH))
-    table_exists = con.execute(
+    table_exists = get_conn().execute(
         "SELECT count(*) FROM information_schema.tables WHERE table_name = 'processed_data'"
     ).fetchone()[0]
-    con.close()
     
     if not table_exists:
         logger.error("STOP: 'processed_data' table missing. Run 03_data_pipeline.py.")
@@ -52,94 +57,164 @@ def get_diverse_modeling_targets(con: duckdb.DuckDBPyConnection):
     SCOUTING: Identifies unique UUIDs for each of the 10 behavioral varieties.
     Ensures the laboratory output covers the full spectrum of enterprise DNA.
     """
+    # Ordered (scenario, variant) search pairs: UPPERCASE scenario, lowercase variant (DB casing)
+    search_pairs = [
+        (scenario_enum.name, SCENARIO_VARIANTS[scenario_enum][v_type].lower())
+        for scenario_enum in Scenario if scenario_enum in SCENARIO_VARIANTS
+        for v_type in ['common', 'rare']
+        if SCENARIO_VARIANTS[scenario_enum].get(v_type)
+    ]
+    
+    # One parameterized scan picks the first host of every variety (instead of one query each)
+    rows = con.execute("""
+        WITH pairs AS (SELECT unnest(?) AS s_search, unnest(?) AS v_search)
+        SELECT h.node_name, h.scenario, h.variant
+        FROM hosts h
+        JOIN pairs p ON h.scenario = p.s_search AND h.variant = p.v_search
+        QUALIFY row_number() OVER (PARTITION BY h.scenario, h.variant ORDER BY h.node_name) = 1
+    """, [[s for s, _ in search_pairs], [v for _, v in search_pairs]]).fetchall()
+    found = {(row[1], row[2]): row for row in rows}
+    
+    # Deterministic sweep: every representative host is modeled on all resources,
+    # so reruns target the same series and the history pull stays one batched query
     targets = []
-    for scenario_enum in Scenario:
-        s_search = scenario_enum.name # UPPERCASE matching DB
-        
-        variants = SCENARIO_VARIANTS.get(scenario_enum, {})
-        for v_type in ['common', 'rare']:
-            v_search = variants.get(v_type, "").lower() # lowercase matching DB
-            if not v_search: continue
-                
-            query = f"""
-                SELECT node_name, scenario, variant
-                FROM hosts 
-                WHERE scenario = '{s_search}' AND variant = '{v_search}'
-                LIMIT 1
-            """
-            
-            result = con.execute(query).fetchone()
-            if result:
-                targets.append({
-                    'host_id': result[0],
-                    'resource': random.choice(['cpu', 'memory']),
-                    'scenario': result[1],
-                    'variant': result[2]
-                })
+    for pair in search_pairs:
+        result = found.get(pair)
+        if not result:
+            continue
+        for resource in RESOURCE_FILE_PREFIXES:
+            targets.append({
+                'host_id': result[0],
+                'resource': resource,
+                'scenario': result[1],
+                'variant': result[2]
+            })
     return targets
 
-def persist_forecast_results(host_id, resource, forecast_df):
+def ensure_forecasts_table(con: duckdb.DuckDBPyConnection):
     """
-    PERSISTENCE: Stores projections in DuckDB for downstream dashboards.
-    Implements a 'Clean and Insert' pattern for idempotency.
+    SCHEMA DEFINITION: Creates the 'forecasts' table once per run, so the
+    per-host persistence path carries no DDL parse/catalog lookup.
     """
-    con = duckdb.connect(str(DB_PATH))
-    
-    # Prepare schema-compliant subset
-    persist_df = forecast_df[['ds', 'yhat', 'yhat_lower', 'yhat_upper']].copy()
-    persist_df['host_id'] = host_id
-    persist_df['resource'] = resource
-    
     con.execute("""
         CREATE TABLE IF NOT EXISTS forecasts (
             ds TIMESTAMP, yhat DOUBLE, yhat_lower DOUBLE, yhat_upper DOUBLE,
             host_id VARCHAR, resource VARCHAR, created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
         )
     """)
+
+def pull_target_histories(con: duckdb.DuckDBPyConnection, targets: list) -> dict:
+    """
+    EXTRACTION: Pulls every target's (ds, y) history in one parameterized scan,
+    keyed by (host_id, resource), instead of one interpolated query per target.
+    """
+    histories = con.execute("""
+        WITH pairs AS (SELECT unnest(?) AS host_id, unnest(?) AS resource)
+        SELECT d.host_id, d.resource, d.ds, d.y
+        FROM processed_data d
+        JOIN pairs p ON d.host_id = p.host_id AND d.resource = p.resource
+        ORDER BY d.host_id, d.resource, d.ds
+    """, [[t['host_id'] for t in targets], [t['resource'] for t in targets]]).df()
+    
+    return {
+        key: frame[['ds', 'y']].reset_index(drop=True)
+        for key, frame in histories.groupby(['host_id', 'resource'], sort=False)
+    }
+
+def persist_forecast_results(results: list):
+    """
+    PERSISTENCE: Stores every lab projection in DuckDB for downstream dashboards.
+    Implements a 'Clean and Insert' pattern for idempotency as one DELETE and one
+    bulk INSERT for the whole batch of (host_id, resource, forecast_df) results.
+    """
+    if not results:
+        return
+    con = get_conn()
+    
+    # Prepare one schema-compliant frame for every target
+    persist_df = pd.concat([
+        forecast_df[['ds', 'yhat', 'yhat_lower', 'yhat_upper']].assign(host_id=host_id, resource=resource)
+        for host_id, resource, forecast_df in results
+    ], ignore_index=True)
     
     # Remove stale forecasts to maintain a single source of truth
-    con.execute("DELETE FROM forecasts WHERE host_id = ? AND resource = ?", [host_id, resource])
+    con.execute("""
+        DELETE FROM forecasts f
+        USING (SELECT unnest(?) AS host_id, unnest(?) AS resource) p
+        WHERE f.host_id = p.host_id AND f.resource = p.resource
+    """, [[r[0] for r in results], [r[1] for r in results]])
     con.execute("INSERT INTO forecasts (ds, yhat, yhat_lower, yhat_upper, host_id, resource) SELECT * FROM persist_df")
-    con.close()
+
+def _lab_worker(task: dict) -> pd.DataFrame:
+    """
+    INDEPENDENT WORKER: Fits, projects and plots one lab target in its own process.
+    Persistence stays in the parent, which owns the single DuckDB writer.
+    """
+    host_id, resource, label, df = task['host_id'], task['resource'], task['label'], task['df']
+    
+    # TRAIN: Applying physical constraints [0, 100]
+    df['cap'], df['floor'] = 100, 0
+    # No posterior sampling: the plotted band comes from in-sample residuals
+    model = Prophet(growth='logistic', yearly_seasonality=True, weekly_seasonality=True,
+                    uncertainty_samples=0)
+    model.fit(df)
+
+    # PROJECT: Future time-grid generation
+    future = model.make_future_dataframe(periods=FORECAST_HORIZON)
+    future['cap'], future['floor'] = 100, 0
+    forecast = residual_intervals(model, model.predict(future))
+
+    # VISUALIZE: Save gallery image (history, projection and interval band)
+    # Dense daily series: full path simplification keeps the Agg draw cheap
+    matplotlib.rcParams['path.simplify_threshold'] = 1.0
+    fig, ax = agg_canvas((10, 6))
+    ax.clear()
+    ax.plot(df['ds'], df['y'], 'k.', markersize=2)
+    ax.plot(forecast['ds'], forecast['yhat'], color='#0072B2')
+    ax.fill_between(forecast['ds'], forecast['yhat_lower'], forecast['yhat_upper'],
+                    color='#0072B2', alpha=0.2)
+    ax.set_title(f"Capacity Forecast: {host_id} ({resource}) | {label}")
+    ax.grid(True, alpha=0.3)
+    fig.savefig(FORECAST_PLOT_DIR / f"forecast_{label}_{resource}.png", dpi=90)
+    
+    # Only the persisted columns travel back across the process boundary
+    return forecast[['ds', 'yhat', 'yhat_lower', 'yhat_upper']]
 
 def run_forecasting_lab():
     """
     ORCHESTRATION: Executes the batch forecasting lifecycle.
+    Prophet fits are independent, so targets fan out over a process pool.
     """
+    # Initialize specialized logging
+    init_root_logging(Path(__file__).stem)
     check_genesis_criteria()
-    con = duckdb.connect(str(DB_PATH))
+    con = get_conn()
+    ensure_forecasts_table(con)
     targets = get_diverse_modeling_targets(con)
+    histories = pull_target_histories(con, targets)
     
-    for target in targets:
-        host_id, resource = target['host_id'], target['resource']
-        label = f"{target['scenario'].lower()}_{target['variant'].lower()}"
-        
-        # Pull history from ABT
-        query = f"SELECT ds, y FROM processed_data WHERE host_id = '{host_id}' AND resource = '{resource}' ORDER BY ds"
-        df = con.execute(query).df()
-        
-        # TRAIN: Applying physical constraints [0, 100]
-        df['cap'], df['floor'] = 100, 0
-        model = Prophet(growth='logistic', yearly_seasonality=True, weekly_seasonality=True)
-        model.fit(df)
-
-        # PROJECT: Future time-grid generation
-        future = model.make_future_dataframe(periods=FORECAST_HORIZON)
-        future['cap'], future['floor'] = 100, 0
-        forecast = model.predict(future)
-
-        # PERSIST: Store for reporting
-        persist_forecast_results(host_id, resource, forecast)
-
-        # VISUALIZE: Save gallery image
-        output_dir = PLOTS_DIR / "forecasts"
-        output_dir.mkdir(parents=True, exist_ok=True)
-        fig = model.plot(forecast)
-        plt.title(f"Capacity Forecast: {host_id} ({resource}) | {label}")
-        plt.savefig(output_dir / f"forecast_{label}_{resource}.png")
-        plt.close(fig)
+    # History from ABT (pre-pulled in one scan) ships to workers by pickle
+    tasks = [
+        {
+            'host_id': target['host_id'],
+            'resource': target['resource'],
+            'label': f"{target['scenario'].lower()}_{target['variant'].lower()}",
+            'df': histories[(target['host_id'], target['resource'])]
+        }
+        for target in targets
+    ]
+    FORECAST_PLOT_DIR.mkdir(parents=True, exist_ok=True)
+    
+    num_workers = max(1, min(len(tasks), os.cpu_count() or 1))
+    logger.info(f"COMPUTE: Fitting {len(tasks)} lab targets across {num_workers} processes...")
+    with ProcessPoolExecutor(max_workers=num_workers) as executor:
+        forecasts = list(executor.map(_lab_worker, tasks))
+    
+    # PERSIST: Store for reporting in one batched write
+    persist_forecast_results([
+        (task['host_id'], task['resource'], forecast) for task, forecast in zip(tasks, forecasts)
+    ])
         
-    con.close()
     logger.info("LAB SHUTDOWN: Projections complete.")
 
 if __name__ == "__main__":
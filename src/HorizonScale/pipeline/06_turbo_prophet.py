@@ -9,8 +9,9 @@ Purpose:
 
 Architecture:
     - Multi-Processing: Uses ProcessPoolExecutor to bypass the GIL.
-    - Slicing: Groups 4 million rows in RAM via Polars for zero-latency worker distribution.
+    - Slicing: Writes 4 million sorted rows once to a memory-mapped Arrow IPC file; workers read their own row range.
     - Validation: Implements a 32-month training vs. 4-month backtest competitive split.
+    - Isolation: Workers never open the DuckDB file; only the driver reads and writes it.
 
 Success (Exit Criteria):
     - 'prophet_results' table populated in DuckDB with yhat and backtest flags.
@@ -19,71 +20,227 @@ Success (Exit Criteria):
 """
 
 import duckdb
+import numpy as np
 import pandas as pd
 import polars as pl
+import pyarrow as pa
+import pyarrow.parquet as pq
 from prophet import Prophet
 from tqdm import tqdm
-from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from multiprocessing import get_context
+from functools import lru_cache
 from pathlib import Path
 import logging
+import os
+import tempfile
 import warnings
 
 # Standard Project Imports
 from horizonscale.lib.config import DB_PATH, MASTER_DATA_DIR, FORECAST_HORIZON
 from horizonscale.lib.logging import init_root_logging, execution_timer
+from horizonscale.lib.utils import residual_intervals, tune_duckdb, register_parquet_view
 
 # Constants for Tournament Logic
 TRAIN_SPLIT_DATE = "2025-08-01"
 BACKTEST_START_DATE = "2025-12-01"
 PARQUET_OUTPUT = MASTER_DATA_DIR / "prophet_turbo_master.parquet"
+TRAIN_SPLIT_CUTOFF = np.datetime64(TRAIN_SPLIT_DATE)
+BACKTEST_CUTOFF = np.datetime64(BACKTEST_START_DATE)
+
+# Archetype mode: fit one Prophet per (scenario, variant, resource) DNA class and
+# project every member from it (~800x fewer fits, approximate per-series shape)
+ARCHETYPE_FITS = False
+
+# Warm starts (opt-in): every series of a DNA class is fitted with LBFGS initialized
+# from one cold-fitted class representative, rescaled to the member's y_scale. The MAP
+# fit is non-convex, so results can still differ from cold per-series fits, and no
+# speedup over cold fits has been measured; chains only bound task size
+WARM_START_FITS = False
+WARM_CHAIN_SIZE = 25
+
+# One thread per worker process: pool concurrency is the parallelism, so BLAS,
+# OpenMP and Stan must not each fan out across the same cores underneath it
+WORKER_THREAD_ENV = {
+    "OMP_NUM_THREADS": "1",
+    "MKL_NUM_THREADS": "1",
+    "OPENBLAS_NUM_THREADS": "1",
+    "STAN_NUM_THREADS": "1",
+}
+
+def _silence_worker_logs():
+    """Silence internal Prophet and Stan logging to prevent IO bottlenecks."""
+    logging.getLogger('prophet').setLevel(logging.ERROR)
+    logging.getLogger('cmdstanpy').setLevel(logging.ERROR)
+    warnings.filterwarnings("ignore", category=RuntimeWarning) # Suppress exp overflow noise
+
+def _new_prophet() -> Prophet:
+    """Logistic growth for realistic utilization bounds."""
+    # uncertainty_samples=0 skips posterior simulation entirely; intervals
+    # are rebuilt from in-sample residuals after predict
+    return Prophet(
+        growth='logistic', 
+        yearly_seasonality=True, 
+        weekly_seasonality=True,
+        uncertainty_samples=0  
+    )
+
+def _fit_and_predict(df: pd.DataFrame, seed: Prophet = None) -> tuple:
+    """
+    Fits one logistic Prophet on the training window and projects backtest + horizon.
+    An optional fitted seed model initializes the optimizer; returns (forecast, model).
+    """
+    # 1. SPLIT: 32-month training window
+    train_df = df[df['ds'] < TRAIN_SPLIT_DATE].copy()
+    train_df['cap'], train_df['floor'] = 100, 0
+    
+    # 2. FIT: Stan's model is compiled once per process; a warm init skips the cold start
+    m = _new_prophet()
+    if seed is None:
+        m.fit(train_df, algorithm='LBFGS')
+    else:
+        try:
+            # Prophet's absmax scale for this series (floor is 0)
+            y_scale = float(train_df['y'].abs().max()) or 1.0
+            m.fit(train_df, algorithm='LBFGS', init=_warm_start_params(seed, y_scale))
+        except Exception:
+            # A warm start that does not fit this series' shapes falls back to a cold fit
+            m = _new_prophet()
+            m.fit(train_df, algorithm='LBFGS')
+
+    # 3. PREDICT: Covers 4-month backtest + 6-month future horizon
+    future = m.make_future_dataframe(periods=120 + FORECAST_HORIZON)
+    future['cap'], future['floor'] = 100, 0
+    return residual_intervals(m, m.predict(future)), m
+
+def _warm_start_params(m: Prophet, y_scale: float) -> dict:
+    """
+    Extracts a fitted model's MAP estimates in the shape Prophet accepts as fit init,
+    expressed in the y_scale of the series about to be fitted.
+    """
+    # Logistic k/m/delta act on time and the scaled cap, so they carry over as-is;
+    # beta and sigma_obs are in y_scaled units and move with the scale ratio
+    ratio = m.y_scale / y_scale
+    params = {name: m.params[name][0][0] for name in ['k', 'm']}
+    params['sigma_obs'] = m.params['sigma_obs'][0][0] * ratio
+    params['delta'] = m.params['delta'][0]
+    params['beta'] = m.params['beta'][0] * ratio
+    return params
+
+def _tag_output(forecast: pd.DataFrame, h_id: str, res: str) -> pd.DataFrame:
+    """Extracts target columns and tags them with series metadata."""
+    # 4. FORMAT: Extract target columns and tag with metadata
+    out = forecast[['ds', 'yhat', 'yhat_lower', 'yhat_upper']].copy()
+    out['host_id'], out['resource'], out['model'] = h_id, res, 'Prophet'
+    
+    # Tagging for the Tournament Layer (Backtest vs. Real Forecast)
+    # (one vectorized datetime64 comparison instead of a per-row strftime)
+    out['data_type'] = np.where(out['ds'].values < BACKTEST_CUTOFF, 'backtest', 'forecast')
+    return out
+
+@lru_cache(maxsize=1)
+def _open_series_file(path: str) -> pa.Table:
+    """Maps the sorted Arrow IPC handoff file once per worker process (zero-copy)."""
+    return pa.ipc.open_file(pa.memory_map(path, 'r')).read_all()
+
+def _load_series(task: dict) -> pd.DataFrame:
+    """Reads one series' ds/y rows from its [row_start, row_end) slice of the handoff file."""
+    table = _open_series_file(task['path'])
+    rows = table.slice(task['row_start'], task['row_end'] - task['row_start'])
+    return rows.select(['ds', 'y']).to_pandas()
 
 def turbo_worker(task: dict) -> pd.DataFrame:
     """
     INDEPENDENT WORKER: Executes the modeling lifecycle for a single series.
     Encapsulated to run in a separate memory space (Process).
     """
-    # Silence internal Prophet and Stan logging to prevent IO bottlenecks
-    logging.getLogger('prophet').setLevel(logging.ERROR)
-    logging.getLogger('cmdstanpy').setLevel(logging.ERROR)
-    warnings.filterwarnings("ignore", category=RuntimeWarning) # Suppress exp overflow noise
+    _silence_worker_logs()
     
-    h_id, res, df = task['h_id'], task['res'], task['df']
+    # Only row offsets crossed the process boundary; the ds/y rows are read
+    # straight out of the memory-mapped handoff file
+    h_id, res = task['h_id'], task['res']
     
     try:
-        # 1. SPLIT: 32-month training window
-        train_df = df[df['ds'] < TRAIN_SPLIT_DATE].copy()
-        train_df['cap'], train_df['floor'] = 100, 0
-        
-        # 2. FIT: Logistic growth for realistic utilization bounds
-        # uncertainty_samples reduced to 100 for 10x throughput gain
-        m = Prophet(
-            growth='logistic', 
-            yearly_seasonality=True, 
-            weekly_seasonality=True,
-            uncertainty_samples=100  
-        )
-        m.fit(train_df)
+        return _tag_output(_fit_and_predict(_load_series(task))[0], h_id, res)
+    except Exception as e:
+        # Individual failures are caught to prevent pool termination
+        return None
 
-        # 3. PREDICT: Covers 4-month backtest + 6-month future horizon
-        future = m.make_future_dataframe(periods=120 + FORECAST_HORIZON)
-        future['cap'], future['floor'] = 100, 0
-        forecast = m.predict(future)
-        
-        # 4. FORMAT: Extract target columns and tag with metadata
-        out = forecast[['ds', 'yhat', 'yhat_lower', 'yhat_upper']].copy()
-        out['host_id'], out['resource'], out['model'] = h_id, res, 'Prophet'
+def archetype_worker(task: dict) -> pd.DataFrame:
+    """
+    ARCHETYPE WORKER: One Prophet fit per (scenario, variant, resource) class.
+    The class representative is fitted once; every member reuses that projection
+    shifted to its own training level, with intervals from its own residuals.
+    """
+    _silence_worker_logs()
+    members = task['members']
+    
+    try:
+        forecast, _ = _fit_and_predict(_load_series(members[0]))
+        grid = forecast['ds'].to_numpy()
+        yhat = forecast['yhat'].to_numpy()
         
-        # Tagging for the Tournament Layer (Backtest vs. Real Forecast)
-        out['data_type'] = out['ds'].apply(
-            lambda x: 'backtest' if x.strftime('%Y-%m-%d') < BACKTEST_START_DATE else 'forecast'
-        )
-        return out
+        outs = []
+        for member in members:
+            # Residuals of the member's training window against the archetype curve
+            series = _load_series(member)
+            ds = series['ds'].to_numpy().astype(grid.dtype)
+            y = series['y'].to_numpy()
+            train = ds < TRAIN_SPLIT_CUTOFF
+            idx = np.minimum(np.searchsorted(grid, ds[train]), grid.size - 1)
+            resid = y[train] - yhat[idx]
+            sigma = float(resid.std())
+            
+            shifted = forecast[['ds']].copy()
+            shifted['yhat'] = yhat + resid.mean()
+            shifted['yhat_lower'] = shifted['yhat'] - 1.96 * sigma
+            shifted['yhat_upper'] = shifted['yhat'] + 1.96 * sigma
+            outs.append(_tag_output(shifted, member['h_id'], member['res']))
+        return pd.concat(outs, ignore_index=True)
     except Exception as e:
-        # Individual failures are caught to prevent pool termination
+        # Class failures are caught to prevent pool termination
         return None
 
-def run_turbo_shop():
-    """ORCHESTRATION: Manages the RAM-to-Process lifecycle."""
+def warm_chain_worker(task: dict) -> pd.DataFrame:
+    """
+    CHAIN WORKER: Fits a run of same-class series, warm-starting every fit from
+    the class representative's optimum (independent of chain order and size).
+    """
+    _silence_worker_logs()
+    
+    # The representative is always fitted cold; its optimum seeds the whole chain
+    representative = task['representative']
+    rep_key = (representative['h_id'], representative['res'])
+    try:
+        rep_forecast, seed = _fit_and_predict(_load_series(representative))
+    except Exception as e:
+        rep_forecast, seed = None, None
+    
+    outs = []
+    for member in task['members']:
+        try:
+            if (member['h_id'], member['res']) == rep_key and rep_forecast is not None:
+                forecast = rep_forecast
+            else:
+                forecast, _ = _fit_and_predict(_load_series(member), seed)
+            outs.append(_tag_output(forecast, member['h_id'], member['res']))
+        except Exception as e:
+            # Individual failures are skipped without affecting the rest of the chain
+            continue
+    return pd.concat(outs, ignore_index=True) if outs else None
+
+def _task_weight(task: dict) -> int:
+    """Rows a task fits or projects (LPT scheduling key)."""
+    if 'members' in task:
+        return sum(_task_weight(member) for member in task['members'])
+    return task['row_end'] - task['row_start']
+
+def run_turbo_shop(archetypes: bool = ARCHETYPE_FITS, warm_start: bool = WARM_START_FITS):
+    """
+    ORCHESTRATION: Manages the RAM-to-Process lifecycle.
+    With archetypes=True series are grouped by host DNA and fitted once per class;
+    otherwise warm_start=True seeds every fit from its class representative.
+    """
     logger = init_root_logging("turbo_prophet")
     
     with execution_timer(logger, "TURBO Prophet Fleet Processing"):
@@ -91,44 +248,120 @@ def run_turbo_shop():
         if PARQUET_OUTPUT.exists(): PARQUET_OUTPUT.unlink()
         
         # B. THE BIG FETCH: High-speed ingestion into memory
-        logger.info("BULK FETCH: Loading 4M+ rows into memory via Polars...")
-        with duckdb.connect(str(DB_PATH)) as con:
-            full_df = con.execute("SELECT ds, y, host_id, resource FROM processed_data").pl()
+        logger.info("BULK FETCH: Loading 4M+ rows into memory via Arrow + Polars...")
+        # Arrow hand-off without a rechunk copy; ORDER BY makes each series one
+        # contiguous run, so a series is fully described by its row offsets
+        with tune_duckdb(duckdb.connect(str(DB_PATH))) as con:
+            rel = con.sql(
+                "SELECT ds, CAST(y AS FLOAT) AS y, host_id, resource FROM processed_data "
+                "ORDER BY host_id, resource, ds"
+            )
+            arrow_table = rel.fetch_arrow_table()  # a Table; .arrow() streams a RecordBatchReader
+            host_dna = con.execute(
+                "SELECT node_name AS host_id, scenario || '/' || variant AS dna FROM hosts"
+            ).fetchall() if archetypes or warm_start else []
         
         # C. SLICE: Partition telemetry for the parallel slam
         logger.info("SLICING: Preparing 8,000 series for distribution...")
+        # HANDOFF: the sorted table is written once to an Arrow IPC file that every
+        # worker memory-maps, so tasks pickle as (file, row_start, row_end, h_id, res)
+        # instead of shipping ~500 ds/y values each through the pool pipes
+        fd, handoff_path = tempfile.mkstemp(prefix="turbo_series_", suffix=".arrow")
+        os.close(fd)
+        with pa.OSFile(handoff_path, 'wb') as sink, pa.ipc.new_file(sink, arrow_table.schema) as ipc:
+            ipc.write_table(arrow_table)
+        
+        # One vectorized aggregation yields every series' offsets; the task dicts
+        # are then just metadata zipped out of the result rows
+        runs = (
+            pl.from_arrow(arrow_table.select(['host_id', 'resource']), rechunk=False)
+            .with_row_index('row')
+            .group_by(['host_id', 'resource'], maintain_order=True)
+            .agg(pl.col('row').min().alias('row_start'), (pl.col('row').max() + 1).alias('row_end'))
+        )
+        del arrow_table
         tasks = [
-            {'h_id': h_id, 'res': res, 'df': group.to_pandas()}
-            for (h_id, res), group in full_df.group_by(['host_id', 'resource'])
+            {'path': handoff_path, 'row_start': start, 'row_end': end, 'h_id': h_id, 'res': res}
+            for h_id, res, start, end in runs.iter_rows()
         ]
+        worker, unit = turbo_worker, "series"
+        if archetypes or warm_start:
+            # GROUP: series by (DNA class, resource)
+            # (the class regroup is a Polars join + list aggregation, not a Python dict loop)
+            dna = pl.DataFrame(host_dna, schema=['host_id', 'dna'], orient='row')
+            classes = (
+                runs.join(dna, on='host_id', how='left', maintain_order='left')
+                .group_by(['dna', 'resource'], maintain_order=True)
+                .agg('host_id', 'row_start', 'row_end')
+            )
+            class_members = [
+                [
+                    {'path': handoff_path, 'row_start': start, 'row_end': end, 'h_id': h_id, 'res': res}
+                    for h_id, start, end in zip(h_ids, starts, ends)
+                ]
+                for _, res, h_ids, starts, ends in classes.iter_rows()
+            ]
+            if archetypes:
+                # SPECIALIZE: one task per DNA class; its first member is the fitted representative
+                tasks = [{'members': members} for members in class_members]
+                worker, unit = archetype_worker, "classes"
+                logger.info(f"ARCHETYPES: {len(tasks)} DNA classes stand in for {len(runs):,} series")
+            else:
+                # CHAIN: bounded runs per class keep warm starts without starving the pool
+                tasks = [
+                    {'representative': members[0], 'members': members[i:i + WARM_CHAIN_SIZE]}
+                    for members in class_members
+                    for i in range(0, len(members), WARM_CHAIN_SIZE)
+                ]
+                worker, unit = warm_chain_worker, "chains"
+                logger.info(f"WARM START: {len(runs):,} series fitted in {len(tasks)} class chains")
+        
+        # LPT scheduling: largest tasks first, so no large fit is left for the tail
+        tasks.sort(key=_task_weight, reverse=True)
 
         # D. PROCESS SLAM: Saturated compute utilizing physical cores
         # We target 12 cores to maximize throughput while avoiding hyperthreading lag
         num_workers = 12 
         logger.info(f"COMPUTE: Saturating {num_workers} cores for the Prophet fleet...")
         
-        with ProcessPoolExecutor(max_workers=num_workers) as executor:
-            results = list(tqdm(
-                executor.map(turbo_worker, tasks), 
-                total=len(tasks), 
-                desc="Prophet Turbo Fleet",
-                unit="series"
-            ))
-
-        # E. CONSOLIDATION: Unify results and persist to dual layers
-        final_dfs = [r for r in results if r is not None]
-        if final_dfs:
-            master_df = pd.concat(final_dfs)
-            
-            # Layer 1: High-performance Parquet for Visualization
-            pl.from_pandas(master_df).write_parquet(PARQUET_OUTPUT)
-            
+        # Spawned workers inherit the single-thread caps before BLAS/Stan initialize
+        os.environ.update(WORKER_THREAD_ENV)
+        
+        # E. CONSOLIDATION: Stream each result into one Parquet file as it arrives
+        # (one row group per series), so memory never holds the whole fleet
+        writer = None
+        total_rows = 0
+        try:
+            with ProcessPoolExecutor(max_workers=num_workers, mp_context=get_context('spawn')) as executor:
+                # Completion order: progress and persistence never wait on one slow fit
+                futures = [executor.submit(worker, task) for task in tasks]
+                for future in tqdm(
+                    as_completed(futures), 
+                    total=len(futures), 
+                    desc="Prophet Turbo Fleet",
+                    unit=unit
+                ):
+                    result = future.result()
+                    if result is None:
+                        continue
+                    table = pa.Table.from_pandas(result, preserve_index=False)
+                    if writer is None:
+                        # Layer 1: High-performance Parquet for Visualization
+                        writer = pq.ParquetWriter(PARQUET_OUTPUT, table.schema)
+                    writer.write_table(table)
+                    total_rows += table.num_rows
+        finally:
+            if writer is not None:
+                writer.close()
+            os.unlink(handoff_path)
+
+        if total_rows:
             # Layer 2: Relational DuckDB for the "Tournament" comparison
-            with duckdb.connect(str(DB_PATH)) as con:
-                con.execute("DROP TABLE IF EXISTS prophet_results")
-                con.execute(f"CREATE TABLE prophet_results AS SELECT * FROM read_parquet('{PARQUET_OUTPUT}')")
+            # (a view: the tournament scans the Parquet in place instead of a copied table)
+            with tune_duckdb(duckdb.connect(str(DB_PATH))) as con:
+                register_parquet_view(con, "prophet_results", PARQUET_OUTPUT)
             
-            logger.info(f"MISSION SUCCESS: {len(master_df):,} projections persisted.")
+            logger.info(f"MISSION SUCCESS: {total_rows:,} projections persisted.")
 
 if __name__ == "__main__":
     run_turbo_shop()
\ No newline at end of file
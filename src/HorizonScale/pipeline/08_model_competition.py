@@ -20,13 +20,12 @@ FIX:
 """
 
 import duckdb
-import pandas as pd
-import polars as pl
 from pathlib import Path
 
 # Project-specific internal libraries
 from horizonscale.lib.config import DB_PATH, MASTER_DATA_DIR
 from horizonscale.lib.logging import init_root_logging, execution_timer
+from horizonscale.lib.utils import register_parquet_view
 
 # Initialize specialized logging
 logger = init_root_logging(Path(__file__).stem)
@@ -39,13 +38,13 @@ CHAMPION_PARQUET = MASTER_DATA_DIR / "champion_forecast_master.parquet"
 def ensure_tables_exist(con):
     """
     Ensures that the model results are registered in the DuckDB session 
-    before the tournament begins.
+    before the tournament begins (as Parquet-backed views, scanned in place).
     """
     tables = [t[0] for t in con.execute("SELECT table_name FROM information_schema.tables").fetchall()]
     if "prophet_results" not in tables:
-        con.execute(f"CREATE TABLE prophet_results AS SELECT * FROM read_parquet('{PROPHET_PARQUET}')")
+        register_parquet_view(con, "prophet_results", PROPHET_PARQUET)
     if "challenger_results" not in tables:
-        con.execute(f"CREATE TABLE challenger_results AS SELECT * FROM read_parquet('{CHALLENGER_PARQUET}')")
+        register_parquet_view(con, "challenger_results", CHALLENGER_PARQUET)
 
 def run_model_tournament():
     """
@@ -102,8 +101,12 @@ def run_model_tournament():
 
         # 3. PERSISTENCE & ANALYTICS
         # Exports the final champion dataset and logs tournament standings.
-        master_df = con.execute("SELECT * FROM final_champion_forecasts").df()
-        pl.from_pandas(master_df).write_parquet(CHAMPION_PARQUET)
+        # DuckDB's multithreaded Parquet writer exports the table directly (no client-side frame)
+        champion_path = str(CHAMPION_PARQUET).replace("\\", "/")
+        con.execute(
+            f"COPY final_champion_forecasts TO '{champion_path}' "
+            "(FORMAT PARQUET, COMPRESSION ZSTD, ROW_GROUP_SIZE 122880)"
+        )
         
         stats = con.execute("""
             SELECT model_type, COUNT(*), AVG(mape) 
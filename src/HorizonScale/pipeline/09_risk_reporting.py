@@ -21,79 +21,98 @@ SUCCESS (EXIT CRITERIA):
     - Risk distribution report logged, detailing model-specific breach counts.
 """
 
-import duckdb
-import pandas as pd
-import matplotlib.pyplot as plt
+import logging
+import os
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 
 # Project-specific internal libraries
-from horizonscale.lib.config import DB_PATH, MASTER_DATA_DIR
+from horizonscale.lib.config import MASTER_DATA_DIR
 from horizonscale.lib.logging import init_root_logging, execution_timer
+from horizonscale.lib.utils import register_parquet_view, get_conn, agg_canvas
 
-# Initialize specialized logging
-logger = init_root_logging(Path(__file__).stem)
+# Root logger handle only: handlers are attached in run_risk_analysis, so spawned
+# render workers re-importing this module never reopen (and truncate) the stage log
+logger = logging.getLogger()
 
 # Directory configurations for reporting
 REPORT_DIR = (MASTER_DATA_DIR / "risk_visuals").resolve()
-REPORT_DIR.mkdir(parents=True, exist_ok=True)
 RISK_REPORT_CSV = MASTER_DATA_DIR / "capacity_risk_report.csv"
 
+def _render_risk_plot(task: dict):
+    """
+    RENDER WORKER: Draws one host/resource risk timeline into the gallery.
+    """
+    host_id, resource = task['host_id'], task['resource']
+    fig, ax = agg_canvas((10, 4))
+    ax.clear()
+    
+    # Plot Configuration
+    ax.plot(task['ds'], task['yhat'], label='Forecast', color='#1f77b4', linewidth=2)
+    ax.fill_between(task['ds'], task['yhat_lower'], task['yhat_upper'], 
+                    color='#1f77b4', alpha=0.2, label='Confidence Interval')
+    
+    # Static Threshold for Breach Definition
+    ax.axhline(y=95, color='red', linestyle='--', label='95% Threshold')
+    
+    ax.set_title(f"CAPACITY RISK: {host_id} | {resource.upper()}")
+    ax.set_xlabel("Timeline (2025 - Early 2026)")
+    ax.set_ylabel("Utilization %")
+    ax.set_ylim(0, max(110, task['yhat_upper'].max() + 5))
+    ax.legend(loc='upper left')
+    ax.grid(alpha=0.3)
+
+    # Persistence to Disk
+    fig.savefig(REPORT_DIR / f"{host_id}_{resource}.png")
+
 def generate_all_risk_plots(con):
     """
     VISUAL GALLERY GENERATOR:
-    Iterates through the identified risks and produces high-resolution PNGs 
+    Pulls every at-risk timeline in one query and renders the PNGs in parallel,
     showing the forecast, confidence intervals, and breach thresholds.
     """
-    # Pulling from the master risk inventory
-    at_risk_servers = con.execute("SELECT host_id, resource FROM capacity_risks").fetchall()
-
-    logger.info(f"Generating full visual gallery: {len(at_risk_servers)} plots...")
+    # Isolating every at-risk host/resource timeline in a single scan
+    # (semi-join on the master risk inventory instead of one query per server)
+    timelines = con.execute("""
+        SELECT host_id, resource, ds, yhat, yhat_lower, yhat_upper 
+        FROM champion_view
+        SEMI JOIN capacity_risks USING (host_id, resource)
+        WHERE ds >= '2025-01-01' AND ds <= '2026-04-01'
+        ORDER BY host_id, resource, ds
+    """).pl()
+    
+    partitions = timelines.partition_by(['host_id', 'resource'], as_dict=True, maintain_order=True)
+    tasks = [
+        {
+            'host_id': host_id,
+            'resource': resource,
+            **{col: group[col].to_numpy() for col in ['ds', 'yhat', 'yhat_lower', 'yhat_upper']}
+        }
+        for (host_id, resource), group in partitions.items()
+    ]
+
+    logger.info(f"Generating full visual gallery: {len(tasks)} plots...")
     logger.info(f"Target Directory: {REPORT_DIR}") 
 
-    for host_id, resource in at_risk_servers:
-        # Isolating the specific host/resource timeline
-        plot_df = con.execute(f"""
-            SELECT ds, yhat, yhat_lower, yhat_upper 
-            FROM champion_view 
-            WHERE host_id = '{host_id}' AND resource = '{resource}'
-            AND ds >= '2025-01-01' AND ds <= '2026-04-01'
-            ORDER BY ds ASC
-        """).df()
-
-        if plot_df.empty: 
-            continue
-
-        # Plot Configuration
-        plt.figure(figsize=(10, 4))
-        plt.plot(plot_df['ds'], plot_df['yhat'], label='Forecast', color='#1f77b4', linewidth=2)
-        plt.fill_between(plot_df['ds'], plot_df['yhat_lower'], plot_df['yhat_upper'], 
-                         color='#1f77b4', alpha=0.2, label='Confidence Interval')
-        
-        # Static Threshold for Breach Definition
-        plt.axhline(y=95, color='red', linestyle='--', label='95% Threshold')
-        
-        plt.title(f"CAPACITY RISK: {host_id} | {resource.upper()}")
-        plt.xlabel("Timeline (2025 - Early 2026)")
-        plt.ylabel("Utilization %")
-        plt.ylim(0, max(110, plot_df['yhat_upper'].max() + 5))
-        plt.legend(loc='upper left')
-        plt.grid(alpha=0.3)
-
-        # Persistence to Disk
-        plt.savefig(REPORT_DIR / f"{host_id}_{resource}.png")
-        plt.close()
+    # Rendering is CPU-bound Agg rasterization: one process per core
+    workers = os.cpu_count()
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        list(executor.map(_render_risk_plot, tasks, chunksize=max(1, len(tasks) // (4 * workers))))
 
 def run_risk_analysis():
     """
     MAIN ANALYTICS LOOP:
     Identifies breaches, calculates risk priority, and orchestrates plotting.
     """
+    # Initialize specialized logging and the gallery target (parent process only)
+    init_root_logging(Path(__file__).stem)
+    REPORT_DIR.mkdir(parents=True, exist_ok=True)
+    
     with execution_timer(logger, "Capacity Risk Analysis"):
-        con = duckdb.connect(str(DB_PATH))
+        con = get_conn(tuned=True)
         
         # Create View for Champion Data
-        champion_parquet = str(MASTER_DATA_DIR / "champion_forecast_master.parquet").replace("\\", "/")
-        con.execute(f"CREATE OR REPLACE VIEW champion_view AS SELECT * FROM read_parquet('{champion_parquet}')")
+        register_parquet_view(con, "champion_view", MASTER_DATA_DIR / "champion_forecast_master.parquet")
 
         # RISK IDENTIFICATION & PRIORITIZATION
         # High volatility (>2) or high impact (>105%) triggers the priority flag (⭐).
@@ -130,7 +149,6 @@ def run_risk_analysis():
         # Final Visual Generation
         generate_all_risk_plots(con)
         
-        con.close()
         logger.info(f"SUCCESS: Report data analyzed and visual gallery generated.")
 
 if __name__ == "__main__":
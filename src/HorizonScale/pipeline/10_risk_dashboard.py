@@ -38,18 +38,13 @@ def get_db_connection():
     """
     return duckdb.connect(str(DB_PATH), read_only=True)
 
-def run_dashboard():
+@st.cache_data
+def load_risk_table(db_mtime: float):
     """
-    ORCHESTRATION: Builds the UI components, fetches risk metrics, 
-    and handles the interactive visual evidence drill-down.
+    Fetches the prioritized risk table once per database version; Streamlit reruns
+    the script on every widget interaction, so callers share this memoized result.
+    Keyed on the DB file's mtime, so a rebuilt 'capacity_risks' is picked up.
     """
-    st.title("🚨 Priority Infrastructure Risks")
-    st.markdown("Focused capacity audit highlighting volatile or extreme utilization peaks.")
-    
-    con = get_db_connection()
-
-    # 1. DATA ACQUISITION
-    # Fetches prioritized risk statistics for the primary audit table.
     query = """
         SELECT 
             priority_flag as " ",
@@ -61,7 +56,19 @@ def run_dashboard():
         FROM capacity_risks
         ORDER BY priority_flag DESC, projected_peak DESC
     """
-    risk_df = con.execute(query).df()
+    return get_db_connection().execute(query).df()
+
+def run_dashboard():
+    """
+    ORCHESTRATION: Builds the UI components, fetches risk metrics, 
+    and handles the interactive visual evidence drill-down.
+    """
+    st.title("🚨 Priority Infrastructure Risks")
+    st.markdown("Focused capacity audit highlighting volatile or extreme utilization peaks.")
+    
+    # 1. DATA ACQUISITION
+    # Fetches prioritized risk statistics for the primary audit table (memoized across reruns).
+    risk_df = load_risk_table(DB_PATH.stat().st_mtime)
 
     # 2. EXECUTIVE METRICS (KPIs)
     # Summarizes the state of the fleet using Streamlit metric components.
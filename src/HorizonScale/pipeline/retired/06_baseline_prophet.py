@@ -32,11 +32,13 @@ Optimized for: 64GB RAM + 20-Thread i7-12700F
 """
 
 import duckdb
+import os
+import numpy as np
 import pandas as pd
-import polars as pl
-from prophet import Prophet
+import pyarrow as pa
+import pyarrow.parquet as pq
 from tqdm import tqdm
-from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 from horizonscale.lib.config import DB_PATH, MASTER_DATA_DIR, FORECAST_HORIZON
 from horizonscale.lib.logging import init_root_logging, execution_timer
@@ -50,13 +52,30 @@ logger = init_root_logging(Path(__file__).stem)
 
 # --- CONFIG ---
 TRAIN_SPLIT_DATE = "2025-08-01" 
+BACKTEST_CUTOFF = np.datetime64("2025-12-01")
+
+# Pre-declared output layout for the streaming Parquet writer
+RESULT_SCHEMA = pa.schema([
+    ('ds', pa.timestamp('ns')),
+    ('yhat', pa.float64()),
+    ('yhat_lower', pa.float64()),
+    ('yhat_upper', pa.float64()),
+    ('host_id', pa.string()),
+    ('resource', pa.string()),
+    ('model', pa.string()),
+    ('data_type', pa.dictionary(pa.int8(), pa.string())),
+])
+DATA_TYPE_LABELS = pa.array(['backtest', 'forecast'])
 PARQUET_OUTPUT = MASTER_DATA_DIR / "prophet_forecast_master.parquet"
 
 def encapsulated_prophet_engine(series_data):
-    """Worker unit receiving pre-loaded data from RAM."""
+    """Worker unit receiving pre-loaded data from RAM (as compact ds/y arrays)."""
+    # Imported in the worker so no Prophet/Stan module state is pickled across processes
+    from prophet import Prophet
+    
     host_id = series_data['host_id']
     resource = series_data['resource']
-    df = series_data['data']
+    df = pd.DataFrame({'ds': series_data['ds'], 'y': series_data['y']})
     
     try:
         # Split history: 32mo Training
@@ -72,13 +91,31 @@ def encapsulated_prophet_engine(series_data):
         
         res = forecast[['ds', 'yhat', 'yhat_lower', 'yhat_upper']].copy()
         res['host_id'], res['resource'], res['model'] = host_id, resource, 'Prophet'
-        res['data_type'] = res['ds'].apply(
-            lambda x: 'backtest' if x.strftime('%Y-%m-%d') < "2025-12-01" else 'forecast'
+        # Vectorized tag (no per-row strftime); categorical halves the concatenated column
+        res['data_type'] = pd.Categorical(
+            np.where(res['ds'].to_numpy(dtype='datetime64[ns]') < BACKTEST_CUTOFF, 'backtest', 'forecast'),
+            categories=['backtest', 'forecast']
         )
         return res
     except Exception:
         return None
 
+def _result_table(res: pd.DataFrame) -> pa.Table:
+    """Arrow table for one series built from its NumPy columns (no pandas conversion)."""
+    n = len(res)
+    return pa.Table.from_pydict({
+        'ds': res['ds'].to_numpy(dtype='datetime64[ns]'),
+        'yhat': res['yhat'].to_numpy(),
+        'yhat_lower': res['yhat_lower'].to_numpy(),
+        'yhat_upper': res['yhat_upper'].to_numpy(),
+        'host_id': pa.repeat(res['host_id'].iat[0], n),
+        'resource': pa.repeat(res['resource'].iat[0], n),
+        'model': pa.repeat('Prophet', n),
+        'data_type': pa.DictionaryArray.from_arrays(
+            pa.array(res['data_type'].cat.codes.to_numpy(), pa.int8()), DATA_TYPE_LABELS
+        ),
+    }, schema=RESULT_SCHEMA)
+
 def run_prophet_shop():
     with execution_timer(logger, "Bulk-Load Prophet Shop"):
         # 1. GENESIS CLEANING
@@ -91,36 +128,44 @@ def run_prophet_shop():
             full_fleet_df = con.execute("SELECT ds, y, host_id, resource FROM processed_data").pl()
         
         # Group data in memory so each task gets its own slice
-        logger.info("Slicing telemetry for threading...")
+        logger.info("Slicing telemetry for the process pool...")
         tasks = []
         for (host_id, resource), group in full_fleet_df.group_by(['host_id', 'resource']):
-            # Convert slice to Pandas only for Prophet compatibility
+            # Plain NumPy arrays pickle far smaller than per-series pandas frames
             tasks.append({
                 'host_id': host_id,
                 'resource': resource,
-                'data': group.to_pandas() 
+                'ds': group['ds'].to_numpy(),
+                'y': group['y'].to_numpy().astype(np.float32)
             })
 
-        # 3. THREADING: Max out your 20 logical threads
-        logger.info(f"Launching 20 threads for {len(tasks)} in-memory series...")
-        with ThreadPoolExecutor(max_workers=20) as executor:
-            results = list(tqdm(
-                executor.map(encapsulated_prophet_engine, tasks), 
+        # 3. PROCESSES: Stan fits are CPU-bound, so every core gets its own interpreter
+        workers = os.cpu_count()
+        logger.info(f"Launching {workers} processes for {len(tasks)} in-memory series...")
+        # 4. CONSOLIDATION & REFLECTION
+        # Each series is written as it arrives and then dropped: no list of
+        # 8,000 frames and no final concat holding the fleet twice
+        total_rows = 0
+        with ProcessPoolExecutor(max_workers=workers) as executor, \
+                pq.ParquetWriter(str(PARQUET_OUTPUT), RESULT_SCHEMA, compression='zstd') as writer:
+            # Chunked dispatch: a few IPC round-trips per worker instead of one per series
+            chunksize = max(1, len(tasks) // (4 * workers))
+            for res in tqdm(
+                executor.map(encapsulated_prophet_engine, tasks, chunksize=chunksize), 
                 total=len(tasks), 
                 desc="🚀 Prophet Shop (Bulk RAM Mode)",
                 unit="series"
-            ))
-            
-        # 4. CONSOLIDATION & REFLECTION
-        final_dfs = [r for r in results if r is not None]
-        if final_dfs:
-            master_df = pd.concat(final_dfs)
-            pl.from_pandas(master_df).write_parquet(PARQUET_OUTPUT)
+            ):
+                if res is None:
+                    continue
+                writer.write_table(_result_table(res))
+                total_rows += len(res)
             
+        if total_rows:
             with duckdb.connect(str(DB_PATH)) as con:
                 con.execute(f"CREATE TABLE prophet_results AS SELECT * FROM read_parquet('{PARQUET_OUTPUT}')")
             
-            logger.info(f"SUCCESS: {len(master_df):,} rows persisted.")
+            logger.info(f"SUCCESS: {total_rows:,} rows persisted.")
 
 if __name__ == "__main__":
     run_prophet_shop()
\ No newline at end of file
@@ -20,7 +20,6 @@ Success (Exit Criteria):
 import duckdb  
 import polars as pl
 import numpy as np
-import random
 from pathlib import Path
 from faker import Faker
 from datetime import datetime
@@ -62,36 +61,35 @@ def seed_hosts_with_variants(con: duckdb.DuckDBPyConnection, num_hosts: int):
     behavioral DNA based on weighted enterprise distributions.
     """
     logger.info(f"SEEDING: Generating {num_hosts} hosts with weighted DNA...")
+    # One entropy-seeded Generator draws every column as a single vectorized
+    # block, replacing per-host calls into the global numpy/random states
+    rng = np.random.default_rng()
     scenarios = list(SCENARIO_DISTRIBUTION.keys())
-    scenario_probs = list(SCENARIO_DISTRIBUTION.values())
     variant_types = list(VARIANT_WEIGHTS.keys())
-    variant_probs = list(VARIANT_WEIGHTS.values())
     
-    hosts_data = []
-    for _ in range(num_hosts):
-        uuid_str = faker.uuid4()
-        # Select Scenario (e.g., Seasonal) and Variant (e.g., Extreme)
-        scenario_member = np.random.choice(scenarios, p=scenario_probs)
-        v_type = np.random.choice(variant_types, p=variant_probs)
-        chosen_variant = SCENARIO_VARIANTS[scenario_member][v_type]
-
-        hosts_data.append({
-            "node_name": f"server-{uuid_str[:8]}",
-            "classification": random.choice(CLASSIFICATIONS).lower(),
-            "server_type": random.choice(SERVER_TYPES).lower(),
-            "region": random.choice(REGIONS).lower(),
-            "cpu_cores": random.choice([16, 32, 64, 128]),
-            "memory_gb": random.choice([64, 128, 256, 512]),
-            "storage_capacity_mb": random.choice([500000, 1000000, 2000000, 5000000]),
-            "department": random.choice(DEPARTMENTS),
-            "scenario": scenario_member.value.lower(),  # Standardized for SQL joins
-            "variant": chosen_variant.lower()
-        })
+    # Select Scenario (e.g., Seasonal) and Variant (e.g., Extreme) per host by index
+    scenario_idx = rng.choice(len(scenarios), size=num_hosts, p=list(SCENARIO_DISTRIBUTION.values()))
+    variant_idx = rng.choice(len(variant_types), size=num_hosts, p=list(VARIANT_WEIGHTS.values()))
+    scenario_names = np.array([s.value.lower() for s in scenarios])  # Standardized for SQL joins
+    variant_names = np.array([[SCENARIO_VARIANTS[s][v].lower() for v in variant_types] for s in scenarios])
+    
+    hosts_data = {
+        "node_name": [f"server-{faker.uuid4()[:8]}" for _ in range(num_hosts)],
+        "classification": rng.choice([c.lower() for c in CLASSIFICATIONS], size=num_hosts),
+        "server_type": rng.choice([t.lower() for t in SERVER_TYPES], size=num_hosts),
+        "region": rng.choice([r.lower() for r in REGIONS], size=num_hosts),
+        "cpu_cores": rng.choice([16, 32, 64, 128], size=num_hosts),
+        "memory_gb": rng.choice([64, 128, 256, 512], size=num_hosts),
+        "storage_capacity_mb": rng.choice([500000, 1000000, 2000000, 5000000], size=num_hosts),
+        "department": rng.choice(DEPARTMENTS, size=num_hosts),
+        "scenario": scenario_names[scenario_idx],
+        "variant": variant_names[scenario_idx, variant_idx]
+    }
 
     hosts_df = pl.DataFrame(hosts_data)
-    con.register("hosts_temp", hosts_df)
-    con.execute("INSERT INTO hosts SELECT * FROM hosts_temp")
-    return [h['node_name'] for h in hosts_data]
+    # Replacement scan: DuckDB reads the local Polars frame directly (no temp view)
+    con.execute("INSERT INTO hosts SELECT * FROM hosts_df")
+    return hosts_data['node_name']
 
 def validate_seeding_success(con: duckdb.DuckDBPyConnection):
     """
@@ -137,8 +135,7 @@ def seed_time_periods(con: duckdb.DuckDBPyConnection, start: str, end: str):
                             interval="1d", eager=True).to_frame("date")
     
     df_time = df_time.with_columns(pl.col("date").dt.strftime("%Y%m").alias("yearmonth"))
-    con.register("time_temp", df_time)
-    con.execute("INSERT INTO time_periods SELECT * FROM time_temp")
+    con.execute("INSERT INTO time_periods SELECT * FROM df_time")
 
 def init_db():
     """ORCHESTRATION: Executes the full database initialization lifecycle."""
@@ -23,11 +23,12 @@ import polars as pl
 import numpy as np
 from tqdm import tqdm
 import os
+from concurrent.futures import ThreadPoolExecutor
 
 from horizonscale.lib.config import (  
     DB_PATH, MASTER_PARQUET_FILE, Scenario, RESOURCE_TYPES, SEED_MODULO  
 )  
-from horizonscale.lib.scenario_generators import GENERATORS
+from horizonscale.lib.scenario_generators import generate_many
 from horizonscale.lib.logging import init_root_logging
 
 # Initialize specialized logging
@@ -84,9 +85,66 @@ def validate_exit_criteria(expected_rows: int):
     
     if actual_rows != expected_rows:
         logger.error(f"DATA LOSS: Expected {expected_rows} rows, but found {actual_rows}.")
+        raise ValueError("Row-count parity failure in master telemetry.")
     else:
         logger.info(f"EXIT CRITERIA SATISFIED: Data integrity verified.")
 
+def synthesize_host(host: dict, resources: list, dates_series: pl.Series, total_days: int) -> list:
+    """
+    SYNTHESIS UNIT: Builds every resource series for a single host.
+    Uses a private np.random.Generator so hosts can be generated concurrently.
+    """
+    node_name = host["node_name"]
+    
+    # NORMALIZATION: Ensure DB strings match UPPERCASE Enum/Config keys
+    scenario_str = str(host["scenario"]).upper().strip()
+    variant_str = str(host["variant"]).upper().strip()
+    
+    scenario_enum = Scenario[scenario_str] 
+
+    # SEEDING: Deterministic hash ensures reproducibility per host/resource
+    seeds = [hash(f"{node_name}_{res}") % SEED_MODULO for res in resources]
+    
+    # MATHEMATICAL SYNTHESIS: every resource series lands in one (resources, days) matrix
+    util_matrix = generate_many(scenario_enum, len(resources), total_days, seeds,
+                                [variant_str] * len(resources))
+
+    frames = []
+    noise = np.empty(total_days, dtype=np.float32)
+    for res, seed, util_series in zip(resources, seeds, util_matrix):
+        # Child stream of the series seed: the generator already consumed the
+        # parent stream, so replaying it would correlate noise with the series
+        rng = np.random.default_rng(np.random.SeedSequence(seed).spawn(1)[0])
+        
+        # POST-PROCESSING: Apply resource-specific noise and adjustments (in place, float32)
+        res_cfg = RESOURCE_TYPES[res]
+        adjust_factor = rng.uniform(*res_cfg['adjust_factor_range'])
+        noise_std = rng.uniform(*res_cfg['noise_std_range'])
+        rng.standard_normal(dtype=np.float32, out=noise)
+        noise *= noise_std
+        util_series *= adjust_factor
+        util_series += noise
+        
+        # CLIPPING: Ensure physically realistic bounds [0, 100%] without a cast copy
+        np.clip(util_series, 0, 100, out=util_series)
+        
+        # Map capacity values based on resource type
+        cap_val = host.get('cpu_cores') if res == 'cpu' else \
+                  host.get('memory_gb') if res == 'memory' else \
+                  host.get('storage_capacity_mb') if res == 'disk' else None
+
+        # Columns come from NumPy buffers and pl.repeat (no Python lists), so the
+        # frame build stays in native code like the generator kernels
+        frames.append(pl.DataFrame({
+            "date": dates_series,
+            "node_name": pl.repeat(node_name, total_days, eager=True),
+            "resource": pl.repeat(res, total_days, eager=True),
+            # STORAGE BOUNDARY: float32 end to end; the refinery keeps y as Float32 in processed parquet
+            "p95_util": pl.Series(util_series, dtype=pl.Float32),
+            "capacity": pl.repeat(cap_val, total_days, dtype=None if cap_val is None else pl.Int64, eager=True)
+        }))
+    return frames
+
 def generate_master_parquet():
     """
     ORCHESTRATION: Executes the high-volume telemetry synthesis loop.
@@ -100,52 +158,22 @@ def generate_master_parquet():
         # Extract host metadata and time dimensions
         hosts_df = con.execute("SELECT node_name, scenario, variant, cpu_cores, memory_gb, storage_capacity_mb FROM hosts").pl()
         dates_list = con.execute("SELECT date FROM time_periods ORDER BY date").fetchall()
-        dates_series = [d[0] for d in dates_list]
+        dates_series = pl.Series("date", [d[0] for d in dates_list])
         total_days = len(dates_series)
         
         resources = list(RESOURCE_TYPES.keys())
         expected_rows = len(hosts_df) * len(resources) * total_days
-        all_data = []
-
-        # GENERATION LOOP: Iterate through hosts and resources to build the time series
-        for host in tqdm(hosts_df.to_dicts(), desc="Synthesizing Telemetry"):
-            node_name = host["node_name"]
-            
-            # NORMALIZATION: Ensure DB strings match UPPERCASE Enum/Config keys
-            scenario_str = str(host["scenario"]).upper().strip()
-            variant_str = str(host["variant"]).upper().strip()
-            
-            scenario_enum = Scenario[scenario_str] 
-            gen_func = GENERATORS[scenario_enum]
-
-            for res in resources:
-                # SEEDING: Deterministic hash ensures reproducibility per host/resource
-                seed = (hash(f"{node_name}_{res}") % SEED_MODULO)
-                np.random.seed(seed)
-                
-                # MATHEMATICAL SYNTHESIS: Call the scenario-specific generator
-                util_series = gen_func(days=total_days, variant=variant_str, base_seed=seed)
-                
-                # POST-PROCESSING: Apply resource-specific noise and adjustments
-                res_cfg = RESOURCE_TYPES[res]
-                util_series = (util_series * np.random.uniform(*res_cfg['adjust_factor_range'])) + \
-                              np.random.normal(0, np.random.uniform(*res_cfg['noise_std_range']), total_days)
-                
-                # CLIPPING: Ensure physically realistic bounds [0, 100%]
-                util_series = np.clip(util_series, 0, 100).astype(np.float32)
-                
-                # Map capacity values based on resource type
-                cap_val = host.get('cpu_cores') if res == 'cpu' else \
-                          host.get('memory_gb') if res == 'memory' else \
-                          host.get('storage_capacity_mb') if res == 'disk' else None
-
-                all_data.append(pl.DataFrame({
-                    "date": dates_series,
-                    "node_name": [node_name] * total_days,
-                    "resource": [res] * total_days,
-                    "p95_util": util_series,
-                    "capacity": [cap_val] * total_days
-                }))
+        
+        # GENERATION LOOP: Hosts are independent and the generators hold no global
+        # RNG state; the Numba kernels run nogil and the frames are built natively,
+        # so a thread pool fans out over hosts
+        with ThreadPoolExecutor(max_workers=os.cpu_count()) as executor:
+            host_frames = executor.map(
+                lambda host: synthesize_host(host, resources, dates_series, total_days),
+                hosts_df.to_dicts()
+            )
+            all_data = [frame for frames in tqdm(host_frames, total=len(hosts_df), desc="Synthesizing Telemetry")
+                        for frame in frames]
 
         # PERSISTENCE: Combine all dataframes and write to high-performance Parquet
         master_df = pl.concat(all_data)